@@ -14,22 +14,40 @@ ARQUITETURA:
 - FileProcessor: Classe principal que orquestra todo o processamento
 
 FLUXO DE EXECUÇÃO:
-main() → FileProcessor.process_file() → para cada linha: process_item() → call_serpro_llm()
+main() → FileProcessor.process_file() → iter_input_lines() → para cada linha: process_item() → call_serpro_llm()
 """
 
 import asyncio          # Para programação assíncrona (requisições HTTP simultâneas)
 import aiohttp          # Cliente HTTP assíncrono para chamadas ao Serpro LLM
-import json             # Para parsing de JSON (respostas do LLM)
+import aiofiles         # Leitura assíncrona do arquivo de entrada (streaming)
+from aiolimiter import AsyncLimiter  # Limite de requisições por minuto (token bucket)
+import orjson           # Serialização JSON rápida (requisições, respostas do LLM e resultados)
 import time             # Para medição de tempo de processamento
-import sys              # Para manipulação de paths e imports
+import sys              # Para manipulação de paths, imports e escrita no console
 import os               # Para variáveis de ambiente e sistema de arquivos
+import ssl              # Contexto SSL reutilizado por todas as conexões
 from pathlib import Path        # Para manipulação moderna de caminhos de arquivo
-from datetime import datetime  # Para timestamps e medição de tempo
-from typing import Dict, List, Any, Optional  # Type hints para melhor documentação
+from datetime import datetime, timezone  # Para timestamps e medição de tempo
+from email.utils import parsedate_to_datetime  # Para header Retry-After em formato de data HTTP
+from typing import Dict, Any, Optional, Tuple  # Type hints para melhor documentação
 import logging          # Para logging detalhado em arquivo
-from dataclasses import dataclass, asdict    # Para estruturas de dados organizadas
+import logging.handlers # QueueHandler/QueueListener e MemoryHandler (log fora do event loop)
+import queue            # Fila de registros de log consumida pela thread do listener
+import atexit           # Encerramento do listener de log ao fim do programa
+from dataclasses import dataclass    # Para estruturas de dados organizadas
 import uuid             # Para geração de IDs únicos
 import traceback        # Para captura detalhada de erros
+from types import MappingProxyType  # Dicionários constantes (somente leitura)
+import re               # Para tokenização e extração de JSON
+import zlib             # Para hash estável das palavras-chave (crc32)
+
+# Numba/NumPy são opcionais: acelera a contagem de palavras-chave do fallback
+try:
+    import numpy as np
+    from numba import njit
+except ImportError:
+    np = None
+    njit = None
 
 # ========== IMPORT DA CONFIGURAÇÃO CENTRALIZADA ==========
 # Importação dinâmica do arquivo 0_config.py para acesso às configurações
@@ -40,9 +58,85 @@ config_module = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(config_module)
 SerproConfig = config_module.SerproConfig
 
+# Cabeçalho opcional do arquivo de entrada
+INPUT_HEADER = "IDTERMO#CPF#PRATICA VEDADA#JUSTIFICATIVA"
+
+# Timestamp dos resultados: formatado uma vez por segundo e reaproveitado
+_ts_cache = [0, ""]  # [segundo epoch, timestamp ISO correspondente]
+
+def _cached_now_iso() -> str:
+    """Timestamp ISO 8601 local, formatado no máximo uma vez por segundo"""
+    now = int(time.time())
+    if now != _ts_cache[0]:
+        _ts_cache[1] = datetime.fromtimestamp(now).isoformat()
+        _ts_cache[0] = now
+    return _ts_cache[1]
+
+# ========== PALAVRAS-CHAVE DO FALLBACK ==========
+# Usadas quando o LLM não retorna JSON válido (ver create_fallback_response)
+
+# Palavras que indicam que a justificativa deve ser aprovada
+APPROVE_WORDS = ("sim", "aprovado", "válido", "procedente", "autorização", "liquidado", "crédito")
+
+# Palavras que indicam que a justificativa deve ser rejeitada
+REJECT_WORDS = ("não", "rejeitado", "inválido", "taxa", "boleto", "renegociar")
+
+_TOKEN_RE = re.compile(r"\w+")
+_APPROVE_SET = frozenset(APPROVE_WORDS)
+_REJECT_SET = frozenset(REJECT_WORDS)
+
+def _token_id(token: str) -> int:
+    """Converte um token em inteiro (crc32) para a contagem compilada"""
+    return zlib.crc32(token.encode("utf-8"))
+
+if njit is not None:
+    _APPROVE_IDS = np.array([_token_id(w) for w in APPROVE_WORDS], dtype=np.int64)
+    _REJECT_IDS = np.array([_token_id(w) for w in REJECT_WORDS], dtype=np.int64)
+    
+    @njit(cache=True)
+    def _score_keywords(token_ids, approve_ids, reject_ids):
+        """Conta quantas palavras de aprovação/rejeição aparecem nos tokens"""
+        approve_count = 0
+        reject_count = 0
+        for x in approve_ids:
+            for t in token_ids:
+                if t == x:
+                    approve_count += 1
+                    break
+        for x in reject_ids:
+            for t in token_ids:
+                if t == x:
+                    reject_count += 1
+                    break
+        return approve_count, reject_count
+
+def count_keywords(content: str) -> Tuple[int, int]:
+    """
+    CONTAGEM DE PALAVRAS-CHAVE DE APROVAÇÃO E REJEIÇÃO
+    
+    Tokeniza o texto uma única vez e conta quantas palavras de cada lista
+    estão presentes. Com Numba instalado a contagem roda em código compilado
+    sobre um array de inteiros; sem Numba usa interseção de conjuntos.
+    
+    Args:
+        content: Texto bruto da resposta do LLM
+        
+    Returns:
+        Tupla (approve_count, reject_count)
+    """
+    tokens = _TOKEN_RE.findall(content.lower())
+    
+    if njit is not None:
+        token_ids = np.fromiter((_token_id(t) for t in tokens), dtype=np.int64, count=len(tokens))
+        approve_count, reject_count = _score_keywords(token_ids, _APPROVE_IDS, _REJECT_IDS)
+        return int(approve_count), int(reject_count)
+    
+    words = set(tokens)
+    return len(words & _APPROVE_SET), len(words & _REJECT_SET)
+
 # ========== ESTRUTURAS DE DADOS ==========
 
-@dataclass
+@dataclass(slots=True)
 class ProcessingResult:
     """
     RESULTADO DO PROCESSAMENTO DE UM ITEM INDIVIDUAL
@@ -57,6 +151,9 @@ class ProcessingResult:
     - REVIEW_REQUIRED: Necessita revisão manual (SIM + 0.5 <= confiança < 0.7)
     - REJECTED: Justificativa inválida (NÃO ou confiança < 0.5)
     - ERROR: Erro no processamento
+    
+    Usa slots=True: uma instância é criada por linha do arquivo, então
+    dispensar o __dict__ reduz a memória e acelera o acesso aos campos.
     """
     id_termo: str                           # ID do termo do processo
     cpf: str                               # CPF do usuário (mascarado nos logs)
@@ -75,9 +172,32 @@ class ProcessingResult:
     def __post_init__(self):
         """Gera timestamp automaticamente se não fornecido"""
         if self.timestamp is None:
-            self.timestamp = datetime.now().isoformat()
+            self.timestamp = _cached_now_iso()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Converte o resultado em dicionário para serialização.
+        
+        Substitui asdict() no caminho quente: os campos são planos, então
+        não há necessidade da cópia profunda recursiva feita por asdict().
+        """
+        return {
+            "id_termo": self.id_termo,
+            "cpf": self.cpf,
+            "pratica_vedada": self.pratica_vedada,
+            "justificativa": self.justificativa,
+            "status": self.status,
+            "diagnostico_llm": self.diagnostico_llm,
+            "confidence": self.confidence,
+            "justificativa_llm": self.justificativa_llm,
+            "error_message": self.error_message,
+            "error_type": self.error_type,
+            "processing_time": self.processing_time,
+            "timestamp": self.timestamp,
+            "attempt_number": self.attempt_number
+        }
 
-@dataclass 
+@dataclass(slots=True)
 class ProcessingStatistics:
     """
     ESTATÍSTICAS GLOBAIS DO PROCESSAMENTO
@@ -105,14 +225,51 @@ class ProcessingStatistics:
         Retorna dicionário com percentuais de cada status.
         Evita divisão por zero se nenhum item foi processado.
         """
-        if self.processed > 0:
-            return {
-                "approval_rate": (self.approved / self.processed) * 100,
-                "rejection_rate": (self.rejected / self.processed) * 100,
-                "review_rate": (self.review_required / self.processed) * 100,
-                "error_rate": (self.errors / self.processed) * 100
-            }
-        return {"approval_rate": 0, "rejection_rate": 0, "review_rate": 0, "error_rate": 0}
+        if not self.processed:
+            return {"approval_rate": 0, "rejection_rate": 0, "review_rate": 0, "error_rate": 0}
+        
+        # Uma única divisão; as quatro taxas usam o mesmo fator
+        scale = 100 / self.processed
+        return {
+            "approval_rate": self.approved * scale,
+            "rejection_rate": self.rejected * scale,
+            "review_rate": self.review_required * scale,
+            "error_rate": self.errors * scale
+        }
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Converte as estatísticas em dicionário (sem a cópia profunda do asdict)"""
+        return {
+            "total_items": self.total_items,
+            "processed": self.processed,
+            "approved": self.approved,
+            "rejected": self.rejected,
+            "review_required": self.review_required,
+            "errors": self.errors,
+            "total_time": self.total_time,
+            "average_time": self.average_time,
+            "start_time": self.start_time,
+            "end_time": self.end_time
+        }
+
+# ========== LOG EM THREAD SEPARADA ==========
+
+# Listener de log ativo no processo (um só; substituído a cada FileProcessor criado)
+_active_log = {"listener": None, "handler": None}
+
+def _stop_active_log():
+    """Para o listener ativo (drena a fila) e grava/fecha o buffer e o arquivo de log"""
+    listener, handler = _active_log["listener"], _active_log["handler"]
+    if listener is None:
+        return
+    _active_log["listener"] = _active_log["handler"] = None
+    listener.stop()
+    target = handler.target
+    handler.close()  # MemoryHandler.close grava o que restar no buffer
+    target.close()
+
+# Registrado uma única vez: encerra o listener que estiver ativo na saída do programa
+atexit.register(_stop_active_log)
 
 # ========== CLASSE PRINCIPAL DO PROCESSADOR ==========
 
@@ -134,6 +291,25 @@ class FileProcessor:
     - Geração automática de relatórios JSON
     """
     
+    # Status do resultado → campo contador em ProcessingStatistics
+    STATUS_FIELDS = {
+        "APPROVED": "approved",
+        "REJECTED": "rejected",
+        "REVIEW_REQUIRED": "review_required",
+        "ERROR": "errors"
+    }
+    
+    # Constantes de exibição do progresso (montadas uma única vez)
+    _SEP = '-' * 70
+    _STATUS_EMOJIS = MappingProxyType({
+        "APPROVED": "✅",        # Aprovado
+        "REJECTED": "❌",        # Rejeitado
+        "REVIEW_REQUIRED": "⚠️", # Precisa revisão
+        "ERROR": "💥"            # Erro
+    })
+    _CONFIDENCE_HIGH = 0.7       # A partir daqui o indicador é 🎯
+    _COMPACT_EVERY = 100         # Intervalo do progresso compacto (saída sem terminal)
+    
     def __init__(self, config_file: str = None):
         """
         INICIALIZAÇÃO DO PROCESSADOR
@@ -148,21 +324,62 @@ class FileProcessor:
         
         # Inicializar estruturas de controle
         self.stats = ProcessingStatistics()     # Estatísticas globais
-        self.results: List[ProcessingResult] = []  # Lista com todos os resultados
         
         # Configurar paths de entrada e saída (cria pastas se não existirem)
         self.paths = self.config.get_file_processing_paths()
         
+        # Delay entre requisições (lido uma vez; usado no ritmo e no progresso)
+        self._delay = self.config.FILE_PROCESSING["delay_between_requests"]
+        
+        # Template do prompt separado uma vez em prefixo/sufixo (sem str.format por item)
+        prefix, suffix = self.config.get_prompt_template().split("{justificativa}", 1)
+        self._prompt_prefix = prefix.replace("{{", "{").replace("}}", "}")
+        self._prompt_suffix = suffix.replace("{{", "{").replace("}}", "}")
+        
+        # Progresso detalhado só faz sentido em terminal; redirecionado vira linha compacta
+        self._verbose_progress = self.config.UI_CONFIG["show_progress"] and sys.stdout.isatty()
+        
         # Configurar sistema de logging (apenas em arquivo, sem duplicação)
         self.setup_logging()
         
         # Variáveis para comunicação HTTP assíncrona
         self.session: Optional[aiohttp.ClientSession] = None
+        self._ssl_ctx = self.create_ssl_context()  # Criado uma única vez
+        
+        # Arquivo results.jsonl aberto durante o processamento (um resultado por linha)
+        self._jsonl = None
+        
+        # Taxas finais calculadas uma única vez ao término do processamento
+        self._final_rates: Optional[Dict[str, float]] = None
+        
+        # Fila de saída do console (ativa apenas durante process_file)
+        self._out_q: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
         
         # Controle de autenticação com Serpro LLM
         self.access_token = None               # Token JWT atual
         self.token_expires_at = None           # Timestamp de expiração do token
+        self._token_lock = asyncio.Lock()      # Uma renovação por vez entre os workers
         
+        # Limitador de taxa (QPM) compartilhado por todas as chamadas ao Serpro
+        self._limiter = AsyncLimiter(self.config.LLM_QPM, 60)
+        
+    def create_ssl_context(self) -> ssl.SSLContext:
+        """
+        CRIAÇÃO DO CONTEXTO SSL
+        
+        Usa as CAs do sistema e, se o certificado Serpro (CERT_FILE) estiver
+        presente, adiciona-o às autoridades confiáveis. O contexto é criado
+        uma vez e compartilhado pelo pool de conexões.
+        
+        Returns:
+            Contexto SSL pronto para o TCPConnector
+        """
+        ssl_ctx = ssl.create_default_context()
+        if Path(self.config.CERT_FILE).exists():
+            ssl_ctx.load_verify_locations(cafile=self.config.CERT_FILE)
+        return ssl_ctx
+    
     def setup_logging(self):
         """
         CONFIGURAÇÃO DO SISTEMA DE LOGGING
@@ -171,6 +388,10 @@ class FileProcessor:
         - Log detalhado em arquivo: JSON/processamento.log
         - Formato: timestamp - level - mensagem
         - Encoding UTF-8 para caracteres especiais
+        - O event loop apenas enfileira registros (QueueHandler); uma thread
+          (QueueListener) grava no arquivo, sem write() bloqueante no loop
+        - Registros acumulados em memória (MemoryHandler) e gravados em lotes.
+          Erros são gravados imediatamente.
         """
         log_file = self.paths["output"] / "processamento.log"
         
@@ -178,7 +399,8 @@ class FileProcessor:
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.INFO)
         
-        # Limpar handlers existentes (evita duplicação)
+        # Encerrar o listener de uma instância anterior antes de trocar os handlers
+        _stop_active_log()
         self.logger.handlers.clear()
         
         # Configurar handler apenas para arquivo
@@ -186,19 +408,40 @@ class FileProcessor:
         file_handler.setFormatter(logging.Formatter(
             '%(asctime)s - %(levelname)s - %(message)s'
         ))
-        self.logger.addHandler(file_handler)
+        
+        # Buffer em memória na frente do arquivo (flush a cada 1024 registros ou em ERROR)
+        self.log_handler = logging.handlers.MemoryHandler(
+            capacity=1024,
+            flushLevel=logging.ERROR,
+            target=file_handler
+        )
+        
+        # Logger só enfileira; a gravação acontece na thread do listener
+        log_queue = queue.SimpleQueue()
+        self.logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        self._log_listener = logging.handlers.QueueListener(
+            log_queue, self.log_handler, respect_handler_level=True
+        )
+        self._log_listener.start()
+        _active_log["listener"] = self._log_listener
+        _active_log["handler"] = self.log_handler
+        
+        # Console detalhado apenas em modo verbose (avisos e erros sempre aparecem)
+        self.verbose = self.config.UI_CONFIG["verbose"]
     
-    def print_clean(self, message: str, emoji: str = ""):
+    def print_clean(self, message: str, emoji: str = "", level: int = logging.INFO):
         """
         SISTEMA DE OUTPUT LIMPO (SEM DUPLICAÇÃO)
         
         Evita duplicação entre console e log:
-        - Console: mensagem formatada com emoji
+        - Console: mensagem formatada com emoji (apenas em modo verbose,
+          exceto avisos e erros que são sempre exibidos)
         - Arquivo: log detalhado para auditoria
         
         Args:
             message: Mensagem a ser exibida
             emoji: Emoji opcional para o console
+            level: Nível de log (logging.INFO, logging.WARNING, ...)
         """
         if emoji:
             formatted_message = f"{emoji} {message}"
@@ -206,30 +449,75 @@ class FileProcessor:
             formatted_message = message
         
         # Log apenas para arquivo (auditoria)
-        self.logger.info(formatted_message)
+        self.logger.log(level, formatted_message)
         
         # Print apenas no console (experiência do usuário)
-        print(formatted_message)
-    
-    # ========== LEITURA E PARSING DE ARQUIVO ==========
+        if self.verbose or level >= logging.WARNING:
+            self.write_console(formatted_message + "\n")
     
-    def read_input_file(self, filename: str = None) -> List[str]:
+    def write_console(self, text: str):
         """
-        LEITURA DO ARQUIVO DE ENTRADA
+        ENVIO DE TEXTO AO CONSOLE
         
-        Lê arquivo TXT com formato: IDTERMO#CPF#PRATICA VEDADA#JUSTIFICATIVA
+        Durante o processamento o texto vai para uma fila limitada, esvaziada
+        pela task console_writer em lotes (um write + flush por lote), sem
+        bloquear os workers com um syscall por linha. Fora do processamento,
+        ou com a fila cheia (console lento), escreve diretamente.
         
-        Funcionalidades:
-        - Detecta automaticamente o arquivo padrão se não especificado
-        - Pula linha de cabeçalho se configurado
-        - Remove linhas vazias
-        - Preserva justificativas que contenham o caractere #
+        Args:
+            text: Texto já formatado (incluindo quebras de linha)
+        """
+        if self._out_q is not None:
+            try:
+                self._out_q.put_nowait(text)
+                return
+            except asyncio.QueueFull:
+                pass
+        sys.stdout.write(text)
+        sys.stdout.flush()
+    
+    async def console_writer(self):
+        """
+        TASK DE ESCRITA NO CONSOLE
+        
+        Consome a fila de saída até receber None, agrupando até 32 mensagens
+        por escrita. Faz flush sempre que a fila esvazia.
+        """
+        buffer = []
+        while True:
+            text = await self._out_q.get()
+            if text is None:
+                break
+            buffer.append(text)
+            if self._out_q.empty() or len(buffer) >= 32:
+                sys.stdout.write("".join(buffer))
+                sys.stdout.flush()
+                buffer.clear()
+        
+        if buffer:
+            sys.stdout.write("".join(buffer))
+            sys.stdout.flush()
+    
+    async def stop_console_writer(self):
+        """Envia o sinal de fim, aguarda a escrita pendente e volta ao modo direto"""
+        if self._writer_task is None:
+            return
+        await self._out_q.put(None)
+        await self._writer_task
+        self._writer_task = None
+        self._out_q = None
+    
+    # ========== LEITURA E PARSING DE ARQUIVO ==========
+    
+    def get_input_path(self, filename: str = None) -> Path:
+        """
+        RESOLVE O CAMINHO DO ARQUIVO DE ENTRADA
         
         Args:
             filename: Nome do arquivo (opcional, usa padrão se None)
             
         Returns:
-            Lista de strings, cada uma representando uma linha processada
+            Path do arquivo de entrada
             
         Raises:
             FileNotFoundError: Se o arquivo não for encontrado
@@ -244,29 +532,71 @@ class FileProcessor:
         if not file_path.exists():
             raise FileNotFoundError(f"Arquivo não encontrado: {file_path}")
         
-        self.print_clean(f"Lendo arquivo: {file_path}", "📖")
+        return file_path
+    
+    async def iter_input_lines(self, filename: str = None):
+        """
+        LEITURA EM STREAMING DO ARQUIVO DE ENTRADA
         
-        # Ler todas as linhas com encoding UTF-8
-        with open(file_path, 'r', encoding=self.config.FILE_PROCESSING["encoding"]) as f:
-            lines = f.readlines()
+        Lê arquivo TXT com formato: IDTERMO#CPF#PRATICA VEDADA#JUSTIFICATIVA
         
-        # Processar linhas (filtrar vazias, pular cabeçalho)
-        processed_lines = []
-        for i, line in enumerate(lines):
-            line = line.strip()  # Remove espaços e quebras de linha
-            if not line:         # Pula linhas vazias
-                continue
-                
-            # Pular linha de cabeçalho se configurado
-            if (i == 0 and self.config.FILE_PROCESSING["skip_header"] 
-                and line.startswith("IDTERMO#CPF#PRATICA VEDADA#JUSTIFICATIVA")):
-                self.print_clean("Pulando linha de cabeçalho", "⏭️")
-                continue
+        Gerador assíncrono que entrega uma linha por vez, sem carregar o
+        arquivo inteiro em memória. Assim a primeira chamada ao LLM pode
+        começar logo após a leitura da primeira linha.
+        
+        Funcionalidades:
+        - Detecta automaticamente o arquivo padrão se não especificado
+        - Pula linha de cabeçalho se configurado
+        - Remove linhas vazias
+        - Preserva justificativas que contenham o caractere #
+        
+        Args:
+            filename: Nome do arquivo (opcional, usa padrão se None)
+            
+        Yields:
+            Strings, cada uma representando uma linha processada
+            
+        Raises:
+            FileNotFoundError: Se o arquivo não for encontrado
+        """
+        file_path = self.get_input_path(filename)
+        skip_header = self.config.FILE_PROCESSING["skip_header"]
+        
+        async with aiofiles.open(file_path, 'r', encoding=self.config.FILE_PROCESSING["encoding"]) as f:
+            # Primeira linha não vazia: único ponto onde o cabeçalho pode aparecer
+            async for line in f:
+                line = line.strip()  # Remove espaços e quebras de linha
+                if not line:         # Pula linhas vazias
+                    continue
                 
-            processed_lines.append(line)
+                # Pular linha de cabeçalho se configurado
+                if not (skip_header and line.startswith(INPUT_HEADER)):
+                    yield line
+                break
+            
+            # Demais linhas: sem verificação de cabeçalho dentro do loop
+            async for line in f:
+                line = line.strip()
+                if line:
+                    yield line
+    
+    async def count_input_lines(self, filename: str = None) -> int:
+        """
+        CONTA AS LINHAS VÁLIDAS DO ARQUIVO DE ENTRADA
         
-        self.print_clean(f"Carregadas {len(processed_lines)} linhas para processamento", "✅")
-        return processed_lines
+        Percorre o arquivo em streaming (memória constante) apenas para
+        obter o total usado no progresso e nas estatísticas.
+        
+        Args:
+            filename: Nome do arquivo (opcional, usa padrão se None)
+            
+        Returns:
+            Quantidade de linhas que serão processadas
+        """
+        total = 0
+        async for _ in self.iter_input_lines(filename):
+            total += 1
+        return total
     
     def parse_line(self, line: str) -> Dict[str, str]:
         """
@@ -276,7 +606,7 @@ class FileProcessor:
         Para dicionário com campos nomeados.
         
         TRATAMENTO ESPECIAL:
-        - Se justificativa contém #, preserva o conteúdo usando join()
+        - Se justificativa contém #, preserva o conteúdo (split limitado a 3 cortes)
         - Exemplo: "123#456#Desconto#Texto com # no meio" → justificativa = "Texto com # no meio"
         
         Args:
@@ -288,7 +618,7 @@ class FileProcessor:
         Raises:
             ValueError: Se formato da linha for inválido (menos de 4 campos)
         """
-        parts = line.split("#")
+        parts = line.split("#", 3)
         if len(parts) < 4:
             raise ValueError(f"Formato inválido. Esperado: IDTERMO#CPF#PRATICA VEDADA#JUSTIFICATIVA")
         
@@ -296,7 +626,7 @@ class FileProcessor:
             "id_termo": parts[0],
             "cpf": parts[1], 
             "pratica_vedada": parts[2],
-            "justificativa": "#".join(parts[3:])  # Join caso justificativa contenha #
+            "justificativa": parts[3]  # Resto da linha, com eventuais # preservados
         }
     
     def validate_data(self, data: Dict[str, str]) -> bool:
@@ -355,10 +685,27 @@ class FileProcessor:
             Exception: Se falhar após todas as tentativas
         """
         # Verificar se token atual ainda é válido
-        if self.access_token and self.token_expires_at:
-            if datetime.now().timestamp() < self.token_expires_at:
+        if self._token_valid():
+            return self.access_token
+        
+        async with self._token_lock:
+            # Outro worker pode ter renovado o token enquanto este aguardava o lock
+            if self._token_valid():
                 return self.access_token
+            return await self._fetch_access_token()
+    
+    def _token_valid(self) -> bool:
+        """Indica se há token em cache ainda dentro do prazo de validade"""
+        return bool(self.access_token and self.token_expires_at
+                    and datetime.now().timestamp() < self.token_expires_at)
+    
+    async def _fetch_access_token(self) -> str:
+        """
+        REQUISIÇÃO OAUTH2 DO TOKEN (chamada apenas com _token_lock adquirido)
         
+        Returns:
+            String com o novo access token
+        """
         # Obter URLs e configurações
         urls = self.config.get_urls()
         retry_config = self.config.RETRY_CONFIG
@@ -372,8 +719,8 @@ class FileProcessor:
                 data = {"grant_type": "client_credentials"}
                 auth = aiohttp.BasicAuth(self.config.CLIENT_ID, self.config.CLIENT_SECRET)
                 
-                # Fazer requisição assíncrona
-                async with self.session.post(
+                # Fazer requisição assíncrona (respeitando o limite de QPM)
+                async with self._limiter, self.session.post(
                     urls["token"], 
                     data=data, 
                     auth=auth,
@@ -382,7 +729,7 @@ class FileProcessor:
                     
                     if response.status == 200:
                         # Token obtido com sucesso
-                        token_data = await response.json()
+                        token_data = orjson.loads(await response.read())
                         self.access_token = token_data["access_token"]
                         
                         # Calcular expiração (com buffer de segurança de 5 min)
@@ -395,7 +742,7 @@ class FileProcessor:
                     else:
                         # Erro HTTP
                         error_text = await response.text()
-                        self.print_clean(f"Erro HTTP {response.status}: {error_text}", "❌")
+                        self.print_clean(f"Erro HTTP {response.status}: {error_text}", "❌", logging.WARNING)
                         
                         # Não fazer retry para erros de autenticação (401, 403)
                         if response.status in [401, 403]:
@@ -407,7 +754,7 @@ class FileProcessor:
                             await asyncio.sleep(delay)
                             
             except Exception as e:
-                self.print_clean(f"Erro ao obter token: {str(e)}", "💥")
+                self.print_clean(f"Erro ao obter token: {str(e)}", "💥", logging.WARNING)
                 if attempt == retry_config["max_retries"]:
                     raise
                     
@@ -425,11 +772,12 @@ class FileProcessor:
         - Renovação automática de token se expirado
         - Retry com backoff exponencial para falhas temporárias
         - Timeouts configuráveis
+        - Limite proativo de requisições por minuto (LLM_QPM)
         - Tratamento específico por tipo de erro
         
         TIPOS DE ERRO TRATADOS:
         - 401: Token expirado → renovar e tentar novamente
-        - 429: Rate limit → aguardar mais tempo
+        - 429/503: Rate limit/indisponível → aguardar Retry-After do servidor
         - 5xx: Erro servidor → retry com backoff
         - Timeout: Problema rede → retry
         
@@ -464,7 +812,8 @@ class FileProcessor:
         # Tentativas com retry
         for attempt in range(1, retry_config["max_retries"] + 1):
             try:
-                async with self.session.post(
+                # Aguardar vaga no limite de QPM antes de enviar (evita 429)
+                async with self._limiter, self.session.post(
                     f"{urls['api']}/chat/completions",
                     headers=headers,
                     json=payload,
@@ -473,14 +822,31 @@ class FileProcessor:
                     
                     if response.status == 200:
                         # Sucesso - parsear resposta
-                        result = await response.json()
+                        result = orjson.loads(await response.read())
                         return self.parse_llm_response(result)
                     
                     elif response.status == 401:
                         # Token expirado - renovar e continuar loop
-                        self.print_clean("Token expirado, renovando...", "🔄")
-                        self.access_token = None
+                        self.logger.info("🔄 Token expirado, renovando...")
+                        # Só invalida se nenhum outro worker já trocou o token rejeitado
+                        if headers["Authorization"] == f"Bearer {self.access_token}":
+                            self.access_token = None
                         await self.get_access_token()
+                        headers["Authorization"] = f"Bearer {self.access_token}"
+                        continue
+                    
+                    elif response.status in (429, 503):
+                        # Rate limit / serviço indisponível - esperar o tempo indicado pelo servidor
+                        error_text = await response.text()
+                        if attempt == retry_config["max_retries"]:
+                            raise Exception(f"HTTP {response.status}: {error_text}")
+                        
+                        delay = self.get_retry_after_delay(response.headers, attempt)
+                        self.print_clean(
+                            f"HTTP {response.status} na tentativa {attempt}, aguardando {delay:.1f}s",
+                            "⏳", logging.WARNING
+                        )
+                        await asyncio.sleep(delay)
                         continue
                     
                     else:
@@ -490,13 +856,13 @@ class FileProcessor:
                         
             except asyncio.TimeoutError:
                 # Timeout - tentar novamente
-                self.print_clean(f"Timeout na tentativa {attempt}", "⏰")
+                self.print_clean(f"Timeout na tentativa {attempt}", "⏰", logging.WARNING)
                 if attempt == retry_config["max_retries"]:
                     raise Exception("Timeout na chamada LLM")
                     
             except Exception as e:
                 # Outros erros
-                self.print_clean(f"Erro LLM tentativa {attempt}: {str(e)}", "❌")
+                self.print_clean(f"Erro LLM tentativa {attempt}: {str(e)}", "❌", logging.WARNING)
                 if attempt == retry_config["max_retries"]:
                     raise
                     
@@ -506,6 +872,57 @@ class FileProcessor:
         
         raise Exception("Falha na chamada LLM após todas as tentativas")
     
+    def get_retry_after_delay(self, headers, attempt: int) -> float:
+        """
+        TEMPO DE ESPERA ANTES DO RETRY (429/503)
+        
+        Usa a indicação do próprio servidor sempre que disponível, evitando
+        esperar demais (ou de menos) com o backoff exponencial fixo.
+        
+        PRIORIDADE:
+        1. Retry-After em segundos ("30") ou data HTTP
+        2. X-RateLimit-Reset (timestamp epoch ou segundos restantes)
+        3. Backoff exponencial configurado em RETRY_CONFIG
+        
+        Args:
+            headers: Headers da resposta HTTP
+            attempt: Número da tentativa atual (1-based)
+            
+        Returns:
+            Tempo de espera em segundos
+        """
+        retry_config = self.config.RETRY_CONFIG
+        delay = None
+        
+        # 1. Retry-After: segundos ou data HTTP (RFC 9110)
+        retry_after = headers.get("Retry-After")
+        if retry_after:
+            retry_after = retry_after.strip()
+            if retry_after.isdigit():
+                delay = float(retry_after)
+            else:
+                try:
+                    retry_at = parsedate_to_datetime(retry_after)
+                    delay = (retry_at - datetime.now(timezone.utc)).total_seconds()
+                except (TypeError, ValueError):
+                    delay = None
+        
+        # 2. X-RateLimit-Reset: epoch absoluto ou segundos até o reset
+        if delay is None:
+            reset = headers.get("X-RateLimit-Reset")
+            if reset:
+                try:
+                    reset_value = float(reset)
+                    delay = reset_value - time.time() if reset_value > 1e9 else reset_value
+                except ValueError:
+                    delay = None
+        
+        # 3. Fallback: backoff exponencial
+        if delay is None:
+            delay = retry_config["retry_delay"] * (retry_config["backoff_multiplier"] ** (attempt - 1))
+        
+        return max(delay, 0.0)
+    
     def parse_llm_response(self, response: Dict) -> Dict[str, Any]:
         """
         PARSING DA RESPOSTA DO LLM
@@ -533,15 +950,14 @@ class FileProcessor:
             # Estratégia 1: JSON direto
             try:
                 if content.strip().startswith('{'):
-                    return {"llm_analysis": json.loads(content)}
+                    return {"llm_analysis": orjson.loads(content)}
                 
                 # Estratégia 2: Extração via regex
-                import re
                 json_match = re.search(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', content, re.DOTALL)
                 if json_match:
-                    return {"llm_analysis": json.loads(json_match.group())}
+                    return {"llm_analysis": orjson.loads(json_match.group())}
                 
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 pass
             
             # Estratégia 3: Fallback inteligente
@@ -558,8 +974,8 @@ class FileProcessor:
         para determinar se a justificativa deve ser aprovada ou rejeitada.
         
         ALGORITMO:
-        1. Converte texto para minúsculas
-        2. Conta palavras que indicam aprovação vs rejeição
+        1. Converte texto para minúsculas e separa em palavras
+        2. Conta palavras que indicam aprovação vs rejeição (count_keywords)
         3. Determina diagnóstico baseado na contagem
         4. Calcula confiança baseada na força das indicações
         
@@ -569,17 +985,8 @@ class FileProcessor:
         Returns:
             Dicionário no formato esperado com diagnóstico inferido
         """
-        content_lower = content.lower()
-        
-        # Palavras que indicam que a justificativa deve ser aprovada
-        approve_words = ["sim", "aprovado", "válido", "procedente", "autorização", "liquidado", "crédito"]
-        
-        # Palavras que indicam que a justificativa deve ser rejeitada
-        reject_words = ["não", "rejeitado", "inválido", "taxa", "boleto", "renegociar"]
-        
-        # Contar ocorrências
-        approve_count = sum(1 for word in approve_words if word in content_lower)
-        reject_count = sum(1 for word in reject_words if word in content_lower)
+        # Contar palavras-chave presentes
+        approve_count, reject_count = count_keywords(content)
         
         # Determinar diagnóstico baseado na contagem
         if approve_count > reject_count:
@@ -627,6 +1034,7 @@ class FileProcessor:
             ProcessingResult com todos os dados e resultado da análise
         """
         start_time = time.time()
+        data = None  # Preenchido no parse; reaproveitado no tratamento de erro
         
         try:
             # 1. Parse da linha
@@ -643,7 +1051,7 @@ class FileProcessor:
                 )
             
             # 3. Criar prompt usando template configurado
-            prompt = self.config.get_prompt_template().format(justificativa=data["justificativa"])
+            prompt = self._prompt_prefix + data["justificativa"] + self._prompt_suffix
             
             # 4. Chamar Serpro LLM
             llm_response = await self.call_serpro_llm(prompt)
@@ -673,20 +1081,19 @@ class FileProcessor:
             )
             
             # 8. Salvar resultado individual se configurado
-            if self.config.FILE_PROCESSING["save_individual_files"]:
+            if (self.config.FILE_PROCESSING["save_individual_files"]
+                    and self.config.FILE_PROCESSING["output_mode"] == "per_file"):
                 await self.save_individual_result(result)
             
             return result
             
         except Exception as e:
             # Tratamento de erros - criar resultado de erro
-            self.print_clean(f"Erro no item {item_number}: {str(e)}", "💥")
+            self.print_clean(f"Erro no item {item_number}: {str(e)}", "💥", logging.WARNING)
             
-            # Tentar parsear dados para o resultado de erro
-            try:
-                data = self.parse_line(line)
-            except:
-                # Se parse falhar, criar dados mínimos
+            # Reaproveitar dados já parseados; só o próprio parse pode ter falhado aqui
+            if data is None:
+                # Se parse falhou, criar dados mínimos
                 data = {"id_termo": f"ERRO_{item_number}", "cpf": "", "pratica_vedada": "", "justificativa": line}
             
             return ProcessingResult(
@@ -703,7 +1110,8 @@ class FileProcessor:
         """
         SALVAR RESULTADO INDIVIDUAL EM ARQUIVO JSON
         
-        Cria um arquivo JSON para cada item processado, permitindo:
+        Cria um arquivo JSON para cada item processado (OUTPUT_MODE=per_file),
+        permitindo:
         - Auditoria detalhada de cada decisão
         - Reprocessamento individual se necessário
         - Análise posterior dos resultados
@@ -711,44 +1119,61 @@ class FileProcessor:
         Formato do arquivo: {id_termo}.json
         Localização: pasta JSON/ configurada
         
+        Todos os resultados também são gravados em results.jsonl
+        (ver write_result_line), independente do modo.
+        
         Args:
             result: Resultado a ser salvo
         """
         filename = f"{result.id_termo}.json"
         filepath = self.paths["output"] / filename
         
-        # Salvar com formatação legível e encoding UTF-8
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(asdict(result), f, indent=self.config.JSON_CONFIG["indent"], ensure_ascii=False)
+        # Salvar com formatação legível (orjson gera UTF-8 sem escapar acentos)
+        option = orjson.OPT_INDENT_2 if self.config.JSON_CONFIG["indent"] else 0
+        with open(filepath, 'wb') as f:
+            f.write(orjson.dumps(result.to_dict(), option=option))
+    
+    async def write_result_line(self, result: ProcessingResult):
+        """
+        GRAVAR RESULTADO NO ARQUIVO JSONL
+        
+        Acrescenta uma linha compacta em JSON/results.jsonl assim que o item
+        termina. Os resultados não ficam acumulados em memória e a
+        serialização é diluída ao longo do processamento (sobreposta às
+        esperas de rede), em vez de um único dump grande no final.
+        
+        Args:
+            result: Resultado a ser gravado
+        """
+        await self._jsonl.write(orjson.dumps(result.to_dict()) + b"\n")
+        
+        # Flush periódico: o arquivo fica utilizável mesmo durante a execução
+        if self.stats.processed % 100 == 0:
+            await self._jsonl.flush()
     
     def update_statistics(self, result: ProcessingResult):
         """
         ATUALIZAR ESTATÍSTICAS GLOBAIS
         
         Incrementa contadores baseado no resultado:
-        - Contadores por status (approved, rejected, etc.)
-        - Métricas de tempo (total e médio)
+        - Contadores por status (approved, rejected, etc.) via STATUS_FIELDS
+        - Tempo total acumulado (o tempo médio é calculado uma vez no final)
         - Total processado
         
         Args:
             result: Resultado para contabilizar
         """
-        self.stats.processed += 1
-        
-        # Incrementar contador específico
-        if result.status == "APPROVED":
-            self.stats.approved += 1
-        elif result.status == "REJECTED":
-            self.stats.rejected += 1
-        elif result.status == "REVIEW_REQUIRED":
-            self.stats.review_required += 1
-        elif result.status == "ERROR":
-            self.stats.errors += 1
+        stats = self.stats
+        stats.processed += 1
+        
+        # Incrementar contador específico (uma busca no dicionário)
+        field = self.STATUS_FIELDS.get(result.status)
+        if field:
+            setattr(stats, field, getattr(stats, field) + 1)
         
         # Atualizar métricas de tempo
         if result.processing_time:
-            self.stats.total_time += result.processing_time
-            self.stats.average_time = self.stats.total_time / self.stats.processed
+            stats.total_time += result.processing_time
     
     # ========== INTERFACE DO USUÁRIO ==========
     
@@ -772,7 +1197,6 @@ class FileProcessor:
         🤖 LLM: SIM (confiança: 0.85) 🎯
         💭 RAZÃO: Justificativa válida - desconto sem autorização
         ℹ️  INFO: ⏱️ 14.2s
-        ⏳ Aguardando 1.0s para próximo item...
         ----------------------------------------------------------------------
         
         Args:
@@ -780,36 +1204,41 @@ class FileProcessor:
             total: Total de itens
             result: Resultado do processamento
         """
+        # Sem terminal (CI, saída redirecionada): uma linha curta a cada 100 itens
+        if not self._verbose_progress:
+            if current % self._COMPACT_EVERY == 0 or current == total:
+                self.print_clean(f"[{current}/{total}] ({current / total * 100:.1f}%)", "📦")
+            return
         
-        # Mapeamento de status para emojis visuais
-        status_emojis = {
-            "APPROVED": "✅",        # Aprovado
-            "REJECTED": "❌",        # Rejeitado
-            "REVIEW_REQUIRED": "⚠️", # Precisa revisão
-            "ERROR": "💥"            # Erro
-        }
+        # Atributos usados várias vezes ligados a variáveis locais
+        sep = self._SEP
+        status = result.status
+        confidence = result.confidence
         
-        emoji = status_emojis.get(result.status, "❓")
+        emoji = self._STATUS_EMOJIS.get(status, "❓")
         percentage = (current / total) * 100
         
+        # Texto montado em memória e enviado ao console de uma vez
+        lines = []
+        
         # Cabeçalho com progresso
-        print(f"\n{'-'*70}")
-        print(f"[{current}/{total}] ({percentage:.1f}%) {emoji} {result.id_termo} - {result.status}")
-        print(f"{'-'*70}")
+        lines.append("\n" + sep)
+        lines.append(f"[{current}/{total}] ({percentage:.1f}%) {emoji} {result.id_termo} - {status}")
+        lines.append(sep)
         
         # Justificativa do usuário COMPLETA (sem cortes)
-        print(f"👤 USUÁRIO: {result.justificativa}")
+        lines.append(f"👤 USUÁRIO: {result.justificativa}")
         
         # Resultado da análise LLM
         if result.diagnostico_llm:
             # Indicador visual de confiança
-            confidence_indicator = "🎯" if result.confidence and result.confidence >= 0.7 else "🤔"
-            confidence_text = f" (confiança: {result.confidence:.2f})" if result.confidence else ""
-            print(f"🤖 LLM: {result.diagnostico_llm}{confidence_text} {confidence_indicator}")
+            confidence_indicator = "🎯" if confidence and confidence >= self._CONFIDENCE_HIGH else "🤔"
+            confidence_text = f" (confiança: {confidence:.2f})" if confidence else ""
+            lines.append(f"🤖 LLM: {result.diagnostico_llm}{confidence_text} {confidence_indicator}")
         
         # Justificativa/razão do LLM
         if result.justificativa_llm:
-            print(f"💭 RAZÃO: {result.justificativa_llm}")
+            lines.append(f"💭 RAZÃO: {result.justificativa_llm}")
         
         # Informações adicionais (tempo, erros)
         info_parts = []
@@ -819,14 +1248,11 @@ class FileProcessor:
             info_parts.append(f"💥 {result.error_message}")
         
         if info_parts:
-            print(f"ℹ️  INFO: {' | '.join(info_parts)}")
+            lines.append(f"ℹ️  INFO: {' | '.join(info_parts)}")
         
-        # Indicador de pausa (exceto último item)
-        if current < total:
-            delay = self.config.FILE_PROCESSING["delay_between_requests"]
-            print(f"⏳ Aguardando {delay}s para próximo item...")
+        lines.append(sep)
         
-        print(f"{'-'*70}")
+        self.write_console("\n".join(lines) + "\n")
     
     async def save_final_statistics(self):
         """
@@ -836,34 +1262,80 @@ class FileProcessor:
         - Estatísticas de processamento
         - Taxas percentuais
         - Configurações utilizadas
-        - Lista detalhada de todos os resultados
+        - Caminho do arquivo com os resultados detalhados (results.jsonl)
+        - Resultados detalhados copiados do results.jsonl (se embed_results)
         
         Arquivo gerado: JSON/estatisticas.json
         """
         if not self.config.STATS_CONFIG["save_stats"]:
             return
         
-        rates = self.stats.calculate_rates()
+        rates = self._final_rates
+        if rates is None:
+            rates = self.stats.calculate_rates()
         
         # Estrutura completa do relatório
         final_stats = {
-            "processamento": asdict(self.stats),
+            "processamento": self.stats.to_dict(),
             "taxas": rates,
             "configuracao": {
                 "modelo_llm": self.config.MODEL_NAME,
                 "arquivo_processado": str(self.paths["input_file"]),
                 "pasta_output": str(self.paths["output"])
             },
-            "resultados_detalhados": [asdict(r) for r in self.results]
+            "arquivo_resultados": str(self.paths["results_file"])  # Um resultado por linha (JSONL)
         }
         
-        # Salvar com formatação legível
+        # Resultados detalhados vêm do JSONL já gravado (garantir que está em disco)
+        results_file = None
+        if self.config.STATS_CONFIG["embed_results"]:
+            if self._jsonl is not None:
+                await self._jsonl.flush()
+            results_file = self.paths["results_file"]
+        
+        # Gravação em thread separada para não bloquear o event loop
         stats_file = self.paths["stats_file"]
-        with open(stats_file, 'w', encoding='utf-8') as f:
-            json.dump(final_stats, f, indent=2, ensure_ascii=False)
+        await asyncio.to_thread(self._write_stats_sync, final_stats, stats_file, results_file)
         
         self.print_clean(f"Estatísticas salvas em: {stats_file}", "💾")
     
+    @staticmethod
+    def _write_stats_sync(payload: Dict[str, Any], path: Path, results_file: Optional[Path] = None):
+        """
+        GRAVAR RELATÓRIO DE ESTATÍSTICAS (BLOQUEANTE)
+        
+        Executado via asyncio.to_thread a partir de save_final_statistics.
+        Formatação legível com orjson (UTF-8 nativo, sem escapar acentos).
+        
+        Se results_file for informado, a lista "resultados_detalhados" é
+        escrita em partes: cada linha do JSONL já está serializada e é
+        copiada direto para o arquivo, sem carregar todos os resultados
+        em memória.
+        
+        Args:
+            payload: Resumo do relatório (sem os resultados detalhados)
+            path: Caminho do arquivo estatisticas.json
+            results_file: Arquivo results.jsonl a incorporar (opcional)
+        """
+        summary = orjson.dumps(payload, option=orjson.OPT_INDENT_2)
+        if results_file is None or not results_file.exists():
+            path.write_bytes(summary)
+            return
+        
+        with open(path, 'wb') as out, open(results_file, 'rb') as src:
+            # Resumo sem o "}" final, seguido da lista aberta
+            out.write(summary[:-2])
+            out.write(b',\n  "resultados_detalhados": [')
+            separator = b"\n    "
+            for line in src:
+                line = line.rstrip()
+                if not line:
+                    continue
+                out.write(separator)
+                out.write(line)
+                separator = b",\n    "
+            out.write(b"\n  ]\n}")
+    
     def print_final_summary(self):
         """
         EXIBIR RELATÓRIO FINAL COMPLETO
@@ -885,61 +1357,106 @@ class FileProcessor:
         [... mais informações ...]
         ======================================================================
         """
-        rates = self.stats.calculate_rates()
+        # Atributos usados várias vezes ligados a variáveis locais
+        stats = self.stats
+        paths = self.paths
+        cfg = self.config
         
-        print(f"\n{'='*70}")
-        print("📊 RELATÓRIO FINAL - SERPRO LLM")
-        print(f"{'='*70}")
+        rates = self._final_rates
+        if rates is None:
+            rates = stats.calculate_rates()
+        
+        # Texto montado em memória e enviado ao console de uma vez
+        lines = []
+        
+        lines.append(f"\n{'='*70}")
+        lines.append("📊 RELATÓRIO FINAL - SERPRO LLM")
+        lines.append(f"{'='*70}")
         
         # Informações básicas do processamento
-        print(f"📁 Arquivo processado: {self.paths['input_file'].name}")
-        print(f"🤖 Modelo utilizado: {self.config.MODEL_NAME}")
-        print(f"🌐 Ambiente: {self.config.AMBIENTE}")
-        print(f"📈 Total processado: {self.stats.processed} itens")
+        lines.append(f"📁 Arquivo processado: {paths['input_file'].name}")
+        lines.append(f"🤖 Modelo utilizado: {cfg.MODEL_NAME}")
+        lines.append(f"🌐 Ambiente: {cfg.AMBIENTE}")
+        lines.append(f"📈 Total processado: {stats.processed} itens")
         
         # Métricas de performance
-        print(f"\n⏱️ PERFORMANCE:")
-        print(f"   Tempo total: {self.stats.total_time:.1f}s ({self.stats.total_time/60:.1f} min)")
-        print(f"   Tempo médio por item: {self.stats.average_time:.1f}s")
+        lines.append(f"\n⏱️ PERFORMANCE:")
+        lines.append(f"   Tempo total: {stats.total_time:.1f}s ({stats.total_time/60:.1f} min)")
+        lines.append(f"   Tempo médio por item: {stats.average_time:.1f}s")
         
         # Resultados detalhados por categoria
-        print(f"\n🎯 RESULTADOS DETALHADOS:")
-        print(f"   ✅ Aprovados: {self.stats.approved} ({rates['approval_rate']:.1f}%)")
-        print(f"   ⚠️ Necessitam revisão: {self.stats.review_required} ({rates['review_rate']:.1f}%)")
-        print(f"   ❌ Rejeitados: {self.stats.rejected} ({rates['rejection_rate']:.1f}%)")
-        print(f"   💥 Erros: {self.stats.errors} ({rates['error_rate']:.1f}%)")
+        lines.append(f"\n🎯 RESULTADOS DETALHADOS:")
+        lines.append(f"   ✅ Aprovados: {stats.approved} ({rates['approval_rate']:.1f}%)")
+        lines.append(f"   ⚠️ Necessitam revisão: {stats.review_required} ({rates['review_rate']:.1f}%)")
+        lines.append(f"   ❌ Rejeitados: {stats.rejected} ({rates['rejection_rate']:.1f}%)")
+        lines.append(f"   💥 Erros: {stats.errors} ({rates['error_rate']:.1f}%)")
         
         # Análise de procedência (aprovados + revisão = casos válidos)
-        print(f"\n📋 ANÁLISE:")
-        total_validos = self.stats.approved + self.stats.review_required
+        lines.append(f"\n📋 ANÁLISE:")
+        total_validos = stats.approved + stats.review_required
         if total_validos > 0:
-            taxa_procedencia = (total_validos / self.stats.processed) * 100
-            print(f"   📈 Taxa de procedência: {taxa_procedencia:.1f}% ({total_validos} de {self.stats.processed})")
+            taxa_procedencia = (total_validos / stats.processed) * 100
+            lines.append(f"   📈 Taxa de procedência: {taxa_procedencia:.1f}% ({total_validos} de {stats.processed})")
         
         # Status de qualidade do processamento
-        if self.stats.errors == 0:
-            print(f"   🎉 Processamento sem erros!")
+        if stats.errors == 0:
+            lines.append(f"   🎉 Processamento sem erros!")
         else:
-            print(f"   ⚠️ {self.stats.errors} erros encontrados - verifique os logs")
+            lines.append(f"   ⚠️ {stats.errors} erros encontrados - verifique os logs")
         
         # Arquivos gerados para auditoria
-        print(f"\n💾 ARQUIVOS GERADOS:")
-        print(f"   📊 Estatísticas: {self.paths['stats_file']}")
-        print(f"   📁 JSONs individuais: {self.paths['output']}")
-        print(f"   📝 Log detalhado: {self.paths['output']}/processamento.log")
+        lines.append(f"\n💾 ARQUIVOS GERADOS:")
+        lines.append(f"   📊 Estatísticas: {paths['stats_file']}")
+        lines.append(f"   📄 Resultados (JSONL): {paths['results_file']}")
+        if cfg.FILE_PROCESSING["output_mode"] == "per_file":
+            lines.append(f"   📁 JSONs individuais: {paths['output']}")
+        lines.append(f"   📝 Log detalhado: {paths['output']}/processamento.log")
         
         # Período de execução
-        if self.stats.start_time and self.stats.end_time:
-            inicio = datetime.fromisoformat(self.stats.start_time).strftime("%H:%M:%S")
-            fim = datetime.fromisoformat(self.stats.end_time).strftime("%H:%M:%S")
-            print(f"\n🕐 PERÍODO: {inicio} → {fim}")
-        
-        print(f"{'='*70}")
-        print("🎉 PROCESSAMENTO CONCLUÍDO COM SUCESSO!")
-        print(f"{'='*70}")
+        if stats.start_time and stats.end_time:
+            inicio = datetime.fromisoformat(stats.start_time).strftime("%H:%M:%S")
+            fim = datetime.fromisoformat(stats.end_time).strftime("%H:%M:%S")
+            lines.append(f"\n🕐 PERÍODO: {inicio} → {fim}")
+        
+        lines.append(f"{'='*70}")
+        lines.append("🎉 PROCESSAMENTO CONCLUÍDO COM SUCESSO!")
+        lines.append(f"{'='*70}")
+        
+        self.write_console("\n".join(lines) + "\n")
     
     # ========== MÉTODO PRINCIPAL ==========
     
+    async def process_worker(self, work_queue: asyncio.Queue, pacer: Optional[AsyncLimiter], total: int):
+        """
+        WORKER DE PROCESSAMENTO CONCORRENTE
+        
+        Consome itens (número, linha) da fila até receber None:
+        1. Aguarda o ritmo de envio (pacer) - substitui o sleep entre itens
+        2. Processa o item (chamada LLM)
+        3. Atualiza estatísticas, grava o resultado em results.jsonl e
+           exibe progresso sob lock (saída legível)
+        
+        Args:
+            work_queue: Fila com tuplas (item_number, line) ou None para encerrar
+            pacer: Limitador de ritmo (1 requisição por delay), ou None sem delay
+            total: Total de itens (para exibição do progresso)
+        """
+        while True:
+            item = await work_queue.get()
+            if item is None:
+                return
+            item_number, line = item
+            
+            if pacer is not None:
+                await pacer.acquire()
+            
+            result = await self.process_item(line, item_number)
+            async with self._progress_lock:
+                self._completed += 1
+                self.update_statistics(result)
+                await self.write_result_line(result)
+                self.print_progress(self._completed, total, result)
+    
     async def process_file(self, filename: str = None):
         """
         MÉTODO PRINCIPAL - PROCESSAR ARQUIVO COMPLETO
@@ -947,12 +1464,14 @@ class FileProcessor:
         Orquestra todo o fluxo de processamento:
         1. Inicialização da sessão HTTP
         2. Leitura do arquivo de entrada
-        3. Loop de processamento item por item
+        3. Processamento concorrente dos itens (workers)
         4. Geração de relatórios finais
         5. Cleanup de recursos
         
         CONTROLE DE FLUXO:
-        - Processamento sequencial com delay configurável
+        - Até max_concurrency chamadas LLM simultâneas (I/O de rede sobreposto)
+        - Ritmo de envio limitado a 1 requisição a cada delay_between_requests
+        - Resultados gravados em results.jsonl à medida que terminam
         - Tratamento robusto de erros
         - Logging detalhado
         - Cleanup garantido em finally
@@ -963,35 +1482,79 @@ class FileProcessor:
         Raises:
             Exception: Erros fatais são propagados após logging
         """
+        max_concurrency = self.config.FILE_PROCESSING["max_concurrency"]
+        delay = self._delay
+        
         try:
-            # 1. Inicializar sessão HTTP assíncrona
-            self.session = aiohttp.ClientSession()
+            # Saída de console via fila limitada + task de escrita em lotes
+            self._out_q = asyncio.Queue(maxsize=1000)
+            self._writer_task = asyncio.create_task(self.console_writer())
+            
+            # 1. Inicializar sessão HTTP assíncrona (pool de conexões keep-alive:
+            #    o handshake TCP/TLS é pago uma vez por conexão, não por item)
+            connector = aiohttp.TCPConnector(
+                ssl=self._ssl_ctx,
+                limit=max_concurrency,
+                limit_per_host=max_concurrency,
+                ttl_dns_cache=300,
+                keepalive_timeout=60,
+                enable_cleanup_closed=True
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                json_serialize=lambda obj: orjson.dumps(obj).decode(),  # Corpo das requisições via orjson
+                timeout=aiohttp.ClientTimeout(
+                    total=self.config.REQUEST_TIMEOUT,
+                    connect=self.config.CONNECTION_TIMEOUT
+                )
+            )
+            
+            # Abrir arquivo de resultados (results.jsonl, um resultado por linha)
+            self._jsonl = await aiofiles.open(self.paths["results_file"], 'wb')
             
-            # 2. Ler e preparar dados do arquivo
-            lines = self.read_input_file(filename)
-            self.stats.total_items = len(lines)
+            # 2. Localizar arquivo e contar itens (leitura em streaming)
+            self.print_clean(f"Lendo arquivo: {self.get_input_path(filename)}", "📖")
+            total = await self.count_input_lines(filename)
+            self.stats.total_items = total
             self.stats.start_time = datetime.now().isoformat()
             
-            self.print_clean(f"Iniciando processamento de {len(lines)} itens", "🚀")
+            self.print_clean(f"Iniciando processamento de {total} itens", "🚀")
+            if delay > 0:
+                # Itens rodam em paralelo: o delay define o ritmo de envio, não uma pausa entre itens
+                self.print_clean(f"Ritmo de envio: 1 requisição a cada {delay}s (até {max_concurrency} simultâneas)", "⏳")
             
-            # 3. Loop principal - processar cada linha
-            for i, line in enumerate(lines, 1):
-                # Processar item individual
-                result = await self.process_item(line, i)
-                
-                # Armazenar resultado e atualizar estatísticas
-                self.results.append(result)
-                self.update_statistics(result)
-                
-                # Exibir progresso detalhado
-                self.print_progress(i, len(lines), result)
-                
-                # Delay entre requests (evita sobrecarga do servidor)
-                if i < len(lines):
-                    await asyncio.sleep(self.config.FILE_PROCESSING["delay_between_requests"])
+            # 3. Processamento concorrente - linhas lidas do disco alimentam os workers
+            self._completed = 0
+            self._progress_lock = asyncio.Lock()
+            work_queue = asyncio.Queue(maxsize=max_concurrency * 2)
+            pacer = AsyncLimiter(1, delay) if delay > 0 else None  # 1 envio a cada `delay` segundos
+            
+            async def feed_queue():
+                """Produtor: enfileira as linhas e, ao fim, um sinal de parada por worker"""
+                i = 0
+                async for line in self.iter_input_lines(filename):
+                    i += 1
+                    await work_queue.put((i, line))
+                for _ in range(max_concurrency):
+                    await work_queue.put(None)
+            
+            tasks = [asyncio.create_task(feed_queue())] + [
+                asyncio.create_task(self.process_worker(work_queue, pacer, total))
+                for _ in range(max_concurrency)
+            ]
+            try:
+                # Falha em qualquer task (ex.: disco cheio ao gravar) interrompe o gather;
+                # o finally cancela as demais, inclusive o produtor bloqueado na fila cheia
+                await asyncio.gather(*tasks)
+            finally:
+                for task in tasks:
+                    task.cancel()
             
             # 4. Finalização e relatórios
             self.stats.end_time = datetime.now().isoformat()
+            if self.stats.processed:
+                self.stats.average_time = self.stats.total_time / self.stats.processed
+            self._final_rates = self.stats.calculate_rates()
             
             # Salvar estatísticas em arquivo JSON
             await self.save_final_statistics()
@@ -1001,14 +1564,23 @@ class FileProcessor:
             
         except Exception as e:
             # Tratamento de erros fatais
-            self.print_clean(f"Erro fatal: {str(e)}", "💥")
+            self.print_clean(f"Erro fatal: {str(e)}", "💥", logging.ERROR)
             self.logger.error(traceback.format_exc())
             raise
             
         finally:
-            # Cleanup garantido (fechar sessão HTTP)
+            # Cleanup garantido (fechar sessão HTTP e arquivo JSONL)
             if self.session:
                 await self.session.close()
+            if self._jsonl is not None:
+                await self._jsonl.close()
+                self._jsonl = None
+            
+            # Escrever no console o que ainda estiver na fila
+            await self.stop_console_writer()
+            
+            # Gravar registros ainda em buffer (o listener segue ativo até a saída do programa)
+            self.log_handler.flush()
 
 # ========== FUNÇÃO PRINCIPAL DE EXECUÇÃO ==========
 
@@ -1070,6 +1642,17 @@ if __name__ == "__main__":
     EXECUÇÃO PRINCIPAL
     
     Executa a função main() de forma assíncrona e retorna exit code apropriado.
-    O asyncio.run() gerencia automaticamente o event loop.
+    Usa o event loop do uvloop (libuv) quando instalado - maior vazão do
+    aiohttp com muitas requisições simultâneas. Sem uvloop (ex.: Windows),
+    o asyncio.run() padrão gerencia o event loop.
     """
-    exit_code = asyncio.run(main())
\ No newline at end of file
+    try:
+        import uvloop
+    except ImportError:
+        uvloop = None
+    
+    if uvloop is not None:
+        with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+            exit_code = runner.run(main())
+    else:
+        exit_code = asyncio.run(main())
\ No newline at end of file
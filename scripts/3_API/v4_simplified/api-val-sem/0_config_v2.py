@@ -22,6 +22,7 @@ class SerproConfig:
         # ========== TIMEOUTS E LIMITES ==========
         self.REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", "60"))  # segundos
         self.CONNECTION_TIMEOUT = int(os.getenv("CONNECTION_TIMEOUT", "10"))  # segundos
+        self.LLM_QPM = int(os.getenv("LLM_QPM", "500"))  # requisições por minuto (limite contratado)
         
         # ========== CONFIGURAÇÕES DE RETRY ==========
         self.RETRY_CONFIG = {
@@ -48,7 +49,9 @@ class SerproConfig:
             "default_filename": os.getenv("DEFAULT_FILENAME", "5.txt"),
             "batch_size": int(os.getenv("BATCH_SIZE", "10")),
             "delay_between_requests": float(os.getenv("DELAY_BETWEEN_REQUESTS", "1.0")),
+            "max_concurrency": int(os.getenv("MAX_CONCURRENCY", "5")),  # chamadas LLM simultâneas
             "save_individual_files": bool(os.getenv("SAVE_INDIVIDUAL_FILES", "true").lower() == "true"),
+            "output_mode": os.getenv("OUTPUT_MODE", "per_file"),  # 'per_file' (+ {id_termo}.json) ou 'jsonl' (apenas results.jsonl)
             "save_summary_stats": bool(os.getenv("SAVE_SUMMARY_STATS", "true").lower() == "true"),
             "encoding": os.getenv("FILE_ENCODING", "utf-8"),
             "skip_header": bool(os.getenv("SKIP_HEADER", "true").lower() == "true")
@@ -75,7 +78,8 @@ class SerproConfig:
             "save_stats": bool(os.getenv("SAVE_STATS", "true").lower() == "true"),
             "stats_file": os.getenv("STATS_FILE", "estatisticas.json"),
             "update_interval": int(os.getenv("STATS_UPDATE_INTERVAL", "10")),  # segundos
-            "track_performance": bool(os.getenv("TRACK_PERFORMANCE", "true").lower() == "true")
+            "track_performance": bool(os.getenv("TRACK_PERFORMANCE", "true").lower() == "true"),
+            "embed_results": bool(os.getenv("EMBED_RESULTS", "true").lower() == "true")  # Copia results.jsonl para o relatório
         }
         
         # ========== API E WEBSERVER ==========
@@ -99,7 +103,8 @@ class SerproConfig:
         self.UI_CONFIG = {
             "use_emojis": bool(os.getenv("USE_EMOJIS", "true").lower() == "true"),
             "show_progress": bool(os.getenv("SHOW_PROGRESS", "true").lower() == "true"),
-            "colored_output": bool(os.getenv("COLORED_OUTPUT", "false").lower() == "true")
+            "colored_output": bool(os.getenv("COLORED_OUTPUT", "false").lower() == "true"),
+            "verbose": bool(os.getenv("VERBOSE", "true").lower() == "true")
         }
         
     def get_urls(self) -> Dict[str, str]:
@@ -128,12 +133,14 @@ class SerproConfig:
         
         input_file = input_folder / self.FILE_PROCESSING["default_filename"]
         stats_file = output_folder / self.STATS_CONFIG["stats_file"]
+        results_file = output_folder / "results.jsonl"
         
         return {
             "input": input_folder,
             "output": output_folder,
             "input_file": input_file,
-            "stats_file": stats_file
+            "stats_file": stats_file,
+            "results_file": results_file
         }
     
     def get_prompt_template(self) -> str:
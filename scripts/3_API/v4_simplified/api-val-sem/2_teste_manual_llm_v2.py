@@ -193,7 +193,7 @@ class TesteLLMManual:
         Para dicionário com campos nomeados.
         
         TRATAMENTO ESPECIAL:
-        - Se justificativa contém #, preserva o conteúdo usando join()
+        - Se justificativa contém #, preserva o conteúdo (split limitado a 3 cortes)
         - Exemplo: "123#456#12#Texto com # no meio" → justificativa = "Texto com # no meio"
         
         Args:
@@ -205,7 +205,7 @@ class TesteLLMManual:
         Raises:
             ValueError: Se formato da linha for inválido (menos de 4 campos)
         """
-        parts = linha.split("#")
+        parts = linha.split("#", 3)
         if len(parts) < 4:
             raise ValueError(f"Formato inválido. Esperado: IDTERMO#CPF#PRATICA VEDADA#JUSTIFICATIVA. Recebido: {linha}")
         
@@ -213,7 +213,7 @@ class TesteLLMManual:
             "id_termo": parts[0].strip(),
             "cpf": parts[1].strip(),
             "pratica_vedada": parts[2].strip(),
-            "justificativa": "#".join(parts[3:]).strip()  # Join caso justificativa contenha #
+            "justificativa": parts[3].strip()  # Resto da linha, com eventuais # preservados
         }
         
     def setup_certificates(self):
@@ -1,161 +1,222 @@
 # logger.py
+import atexit
 import logging
 import os
+import queue
+from collections import deque
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from pathlib import Path
 
+class RecentLogsHandler(logging.Handler):
+    """Mantém em memória as últimas linhas formatadas (endpoint /logs)"""
+    
+    def __init__(self, maxlen=100):
+        super().__init__()
+        self.records = deque(maxlen=maxlen)
+        self.total = 0
+    
+    def emit(self, record):
+        try:
+            self.records.append(self.format(record) + "\n")
+            self.total += 1
+        except Exception:
+            self.handleError(record)
+    
+    def recent(self):
+        """Retorna (total de registros desde o início, últimas linhas)"""
+        with self.lock:
+            return self.total, list(self.records)
+
 class SemanticaLogger:
     def __init__(self):
         self.setup_logging()
     
     def setup_logging(self):
-        """Configura sistema de logging"""
+        """Configura sistema de logging
+        
+        Os loggers apenas enfileiram registros (QueueHandler); a escrita nos
+        arquivos rotativos e no console é feita por uma thread separada
+        (QueueListener), fora do caminho das requisições.
+        """
         # Criar pasta de logs
         log_dir = Path("logs")
         log_dir.mkdir(exist_ok=True)
         
-        # Configurar formato
-        formatter = logging.Formatter(
+        # Configurar formato (instância única compartilhada por todos os handlers)
+        self._formatter = logging.Formatter(
             '%(asctime)s | %(levelname)-8s | %(name)s | %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
         
-        # Logger principal
-        self.logger = logging.getLogger('semantica_api')
-        self.logger.setLevel(logging.INFO)
-        
-        # Remover handlers existentes
-        self.logger.handlers.clear()
-        
         # Handler para arquivo principal (rotativo)
-        main_handler = RotatingFileHandler(
-            log_dir / "semantica_api.log",
-            maxBytes=10*1024*1024,  # 10MB
-            backupCount=5,
-            encoding='utf-8'
-        )
-        main_handler.setLevel(logging.INFO)
-        main_handler.setFormatter(formatter)
-        self.logger.addHandler(main_handler)
+        main_handler = self._make_handler(log_dir / "semantica_api.log", 10, 5, logging.INFO, 'semantica_api')
         
         # Handler para erros (separado)
-        error_handler = RotatingFileHandler(
-            log_dir / "errors.log",
-            maxBytes=5*1024*1024,  # 5MB
-            backupCount=3,
-            encoding='utf-8'
-        )
-        error_handler.setLevel(logging.ERROR)
-        error_handler.setFormatter(formatter)
-        self.logger.addHandler(error_handler)
+        error_handler = self._make_handler(log_dir / "errors.log", 5, 3, logging.ERROR, 'semantica_api')
         
         # Handler para console (opcional)
         console_handler = logging.StreamHandler()
         console_handler.setLevel(logging.INFO)
-        console_handler.setFormatter(formatter)
-        self.logger.addHandler(console_handler)
+        console_handler.setFormatter(self._formatter)
+        console_handler.addFilter(logging.Filter('semantica_api'))
+        
+        # Handler específico para LLM calls
+        llm_handler = self._make_handler(log_dir / "llm_calls.log", 20, 3, logging.DEBUG, 'serpro_llm')
+        
+        # Handler para WebSocket
+        ws_handler = self._make_handler(log_dir / "websocket.log", 5, 2, logging.INFO, 'websocket')
+        
+        # Últimas linhas do log principal em memória (evita reler o arquivo no /logs)
+        self.recent_logs = RecentLogsHandler(maxlen=100)
+        self.recent_logs.setLevel(logging.INFO)
+        self.recent_logs.setFormatter(self._formatter)
+        self.recent_logs.addFilter(logging.Filter('semantica_api'))
+        
+        # Fila única: hot path só faz put; os filtros acima separam por logger
+        self._log_queue = queue.Queue(-1)
+        queue_handler = QueueHandler(self._log_queue)
+        
+        # Logger principal
+        self.logger = logging.getLogger('semantica_api')
+        self.logger.setLevel(logging.INFO)
         
         # Logger específico para LLM calls
         self.llm_logger = logging.getLogger('serpro_llm')
         self.llm_logger.setLevel(logging.DEBUG)
         
-        llm_handler = RotatingFileHandler(
-            log_dir / "llm_calls.log",
-            maxBytes=20*1024*1024,  # 20MB
-            backupCount=3,
-            encoding='utf-8'
-        )
-        llm_handler.setLevel(logging.DEBUG)
-        llm_handler.setFormatter(formatter)
-        self.llm_logger.addHandler(llm_handler)
-        
         # Logger para WebSocket
         self.ws_logger = logging.getLogger('websocket')
         self.ws_logger.setLevel(logging.INFO)
         
-        ws_handler = RotatingFileHandler(
-            log_dir / "websocket.log",
-            maxBytes=5*1024*1024,  # 5MB
-            backupCount=2,
-            encoding='utf-8'
+        for logger in (self.logger, self.llm_logger, self.ws_logger):
+            # Remover handlers existentes
+            logger.handlers.clear()
+            logger.addHandler(queue_handler)
+        
+        # Thread de escrita (parada no encerramento do processo)
+        self._listener = QueueListener(
+            self._log_queue,
+            main_handler, error_handler, console_handler, llm_handler, ws_handler, self.recent_logs,
+            respect_handler_level=True
         )
-        ws_handler.setLevel(logging.INFO)
-        ws_handler.setFormatter(formatter)
-        self.ws_logger.addHandler(ws_handler)
+        self._listener.start()
+        atexit.register(self._listener.stop)
         
         # Log inicial
         self.logger.info("=== Sistema de Logging Iniciado ===")
         self.logger.info(f"Logs sendo salvos em: {log_dir.absolute()}")
     
+    def _make_handler(self, path, max_mb, backups, level, logger_name):
+        """Cria handler rotativo com o formatter compartilhado
+        
+        Args:
+            path: Arquivo de log
+            max_mb: Tamanho máximo em MB antes de rotacionar
+            backups: Quantidade de arquivos de backup
+            level: Nível mínimo do handler
+            logger_name: Logger cujos registros o handler aceita
+            
+        Returns:
+            RotatingFileHandler configurado
+        """
+        handler = RotatingFileHandler(
+            path,
+            maxBytes=max_mb*1024*1024,
+            backupCount=backups,
+            encoding='utf-8'
+        )
+        handler.setLevel(level)
+        handler.setFormatter(self._formatter)
+        handler.addFilter(logging.Filter(logger_name))
+        return handler
+    
     def log_api_request(self, endpoint, data=None, result=None, error=None, processing_time=None):
         """Log de requisições da API"""
+        level = logging.ERROR if error else logging.INFO
+        if not self.logger.isEnabledFor(level):
+            return
         try:
             if error:
-                self.logger.error(f"API {endpoint} | ERRO: {error}")
+                self.logger.error("API %s | ERRO: %s", endpoint, error)
             else:
                 status = result.get('status', 'UNKNOWN') if result else 'NO_RESULT'
-                confidence = result.get('confidence', 0) if result else 0
+                # Convertido aqui: valor inválido falha dentro do try, não na thread do listener
+                confidence = float(result.get('confidence') or 0) if result else 0.0
                 time_str = f" | {processing_time:.2f}s" if processing_time else ""
                 
-                self.logger.info(f"API {endpoint} | {status} | {confidence:.2f}{time_str}")
+                self.logger.info("API %s | %s | %.2f%s", endpoint, status, confidence, time_str)
         except Exception as e:
-            self.logger.error(f"Erro ao fazer log da requisição: {e}")
+            self.logger.error("Erro ao fazer log da requisição: %s", e)
     
     def log_llm_call(self, prompt_preview, result=None, error=None, processing_time=None):
         """Log específico para chamadas LLM"""
+        level = logging.ERROR if error else logging.INFO
+        if not self.llm_logger.isEnabledFor(level):
+            return
         try:
             # Preview do prompt (primeiros 100 caracteres)
             prompt_short = prompt_preview[:100].replace('\n', ' ') + "..." if len(prompt_preview) > 100 else prompt_preview
             
             if error:
-                self.llm_logger.error(f"LLM_CALL | ERRO: {error} | Prompt: {prompt_short}")
+                self.llm_logger.error("LLM_CALL | ERRO: %s | Prompt: %s", error, prompt_short)
             else:
                 diagnostico = result.get('diagnosticoLLM', 'N/A') if result else 'NO_RESULT'
-                confidence = result.get('confidence', 0) if result else 0
+                # Convertido aqui: valor inválido falha dentro do try, não na thread do listener
+                confidence = float(result.get('confidence') or 0) if result else 0.0
                 time_str = f" | {processing_time:.2f}s" if processing_time else ""
                 
-                self.llm_logger.info(f"LLM_CALL | {diagnostico} | {confidence:.2f}{time_str} | Prompt: {prompt_short}")
+                self.llm_logger.info("LLM_CALL | %s | %.2f%s | Prompt: %s", diagnostico, confidence, time_str, prompt_short)
         except Exception as e:
-            self.llm_logger.error(f"Erro ao fazer log da chamada LLM: {e}")
+            self.llm_logger.error("Erro ao fazer log da chamada LLM: %s", e)
     
     def log_websocket_event(self, event, data=None, error=None):
         """Log de eventos WebSocket"""
+        level = logging.ERROR if error else logging.INFO
+        if not self.ws_logger.isEnabledFor(level):
+            return
         try:
             if error:
-                self.ws_logger.error(f"WS_{event} | ERRO: {error}")
+                self.ws_logger.error("WS_%s | ERRO: %s", event, error)
             else:
                 data_str = str(data)[:200] if data else ""
-                self.ws_logger.info(f"WS_{event} | {data_str}")
+                self.ws_logger.info("WS_%s | %s", event, data_str)
         except Exception as e:
-            self.ws_logger.error(f"Erro ao fazer log do WebSocket: {e}")
+            self.ws_logger.error("Erro ao fazer log do WebSocket: %s", e)
     
     def log_file_processing(self, filename, total_items, results_summary):
         """Log de processamento de arquivos"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         try:
             approved = results_summary.get('approved', 0)
             rejected = results_summary.get('rejected', 0)
             review = results_summary.get('review_required', 0)
             errors = results_summary.get('errors', 0)
             
-            self.logger.info(f"FILE_PROCESSING | {filename} | Total: {total_items} | "
-                           f"Aprovados: {approved} | Rejeitados: {rejected} | "
-                           f"Revisão: {review} | Erros: {errors}")
+            self.logger.info("FILE_PROCESSING | %s | Total: %s | "
+                             "Aprovados: %s | Rejeitados: %s | "
+                             "Revisão: %s | Erros: %s",
+                             filename, total_items, approved, rejected, review, errors)
         except Exception as e:
-            self.logger.error(f"Erro ao fazer log do processamento: {e}")
+            self.logger.error("Erro ao fazer log do processamento: %s", e)
     
     def log_error(self, context, error, details=None):
         """Log de erros gerais"""
+        if not self.logger.isEnabledFor(logging.ERROR):
+            return
         try:
             details_str = f" | Detalhes: {details}" if details else ""
-            self.logger.error(f"{context} | {str(error)}{details_str}")
+            self.logger.error("%s | %s%s", context, error, details_str)
         except Exception as e:
             print(f"Erro crítico no sistema de logging: {e}")
     
     def log_info(self, message, context="GENERAL"):
         """Log de informações gerais"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         try:
-            self.logger.info(f"{context} | {message}")
+            self.logger.info("%s | %s", context, message)
         except Exception as e:
             print(f"Erro ao fazer log de info: {e}")
 
@@ -1,8 +1,25 @@
 # models.py
+import re
+import time
+from functools import cached_property
 from pydantic import BaseModel, Field, field_validator
 from typing import Optional
 from datetime import datetime
 
+# Remove tudo que não for dígito (compilado uma vez, usado a cada requisição)
+_NON_DIGIT = re.compile(r'\D')
+
+# Timestamp compartilhado pelos objetos criados dentro do mesmo segundo
+_ts_cache = [0, ""]  # [segundo epoch, timestamp ISO correspondente]
+
+def _cached_now_iso() -> str:
+    """Timestamp ISO 8601 local, formatado no máximo uma vez por segundo"""
+    now = int(time.time())
+    if now != _ts_cache[0]:
+        _ts_cache[1] = datetime.fromtimestamp(now).isoformat()
+        _ts_cache[0] = now
+    return _ts_cache[1]
+
 class SemanticaInput(BaseModel):
     """Modelo para entrada de análise semântica - Apenas JSON estruturado"""
     
@@ -64,7 +81,7 @@ class SemanticaInput(BaseModel):
     @classmethod
     def validate_cpf(cls, v):
         """Validação básica do CPF"""
-        cpf_clean = ''.join(filter(str.isdigit, v))
+        cpf_clean = _NON_DIGIT.sub('', v)
         if len(cpf_clean) != 11:
             raise ValueError('CPF deve ter 11 dígitos')
         return cpf_clean
@@ -81,9 +98,14 @@ class SemanticaInput(BaseModel):
         """Sempre retorna JSON estruturado"""
         return "JSON_ESTRUTURADO"
     
+    @cached_property
+    def internal_format(self):
+        """Formato interno (linha IDTERMO#CPF#PRATICA#JUSTIFICATIVA), montado uma vez por instância"""
+        return "#".join((self.id_termo, self.cpf, self.pratica_vedada, self.justificativa))
+    
     def to_internal_format(self):
         """Converte para formato interno (compatibilidade)"""
-        return f"{self.id_termo}#{self.cpf}#{self.pratica_vedada}#{self.justificativa}"
+        return self.internal_format
 
 class SemanticaResponse(BaseModel):
     """Resposta da análise semântica"""
@@ -94,7 +116,7 @@ class SemanticaResponse(BaseModel):
     justificativa_llm: str = Field(description="Justificativa do LLM")
     processing_time: float = Field(description="Tempo de processamento (segundos)")
     analysis_id: str = Field(description="ID único da análise")
-    timestamp: str = Field(default_factory=lambda: datetime.now().isoformat())
+    timestamp: str = Field(default_factory=_cached_now_iso)
     
     model_config = {
         "json_schema_extra": {
@@ -105,7 +127,7 @@ class SemanticaResponse(BaseModel):
                 "justificativa_llm": "A justificativa indica claramente uma consignação sem autorização prévia.",
                 "processing_time": 1.23,
                 "analysis_id": "a1b2c3d4",
-                "timestamp": "2025-06-05T15:30:15.123456"
+                "timestamp": "2025-06-05T15:30:15"
             }
         }
     }
@@ -123,4 +145,4 @@ class ProcessingResult(BaseModel):
     justificativa_llm: Optional[str] = None
     error_message: Optional[str] = None
     processing_time: Optional[float] = None
-    timestamp: str = Field(default_factory=lambda: datetime.now().isoformat())
\ No newline at end of file
+    timestamp: str = Field(default_factory=_cached_now_iso)
\ No newline at end of file
@@ -1,19 +1,27 @@
 // script.js
 let ws;
 let statsInterval;
+const utf8Decoder = new TextDecoder('utf-8');
 
 // Conectar WebSocket
 function connectWebSocket() {
     const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
     ws = new WebSocket(`${protocol}//${window.location.host}/ws/semantica-consignacao`);
+    ws.binaryType = 'arraybuffer';  // Servidor envia JSON em frames binários (UTF-8)
     
     ws.onopen = function() {
         addLog("✅ WebSocket conectado");
     };
     
     ws.onmessage = function(event) {
-        const data = JSON.parse(event.data);
-        handleWebSocketMessage(data);
+        const text = typeof event.data === 'string' ? event.data : utf8Decoder.decode(event.data);
+        const data = JSON.parse(text);
+        // Servidor agrupa atualizações de progresso em lotes
+        if (data.batch) {
+            data.batch.forEach(handleWebSocketMessage);
+        } else {
+            handleWebSocketMessage(data);
+        }
     };
     
     ws.onclose = function() {
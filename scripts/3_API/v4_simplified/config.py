@@ -11,6 +11,9 @@ MODEL_NAME = "deepseek-r1-distill-qwen-14b"
 REQUEST_TIMEOUT = 60
 MAX_RETRIES = 3
 RETRY_DELAY = 1.0
+LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "1"))  # Justificativas por chamada no processamento em lote (1 = desativado)
+LLM_MAX_OUTPUT_TOKENS = int(os.getenv("LLM_MAX_OUTPUT_TOKENS", "4096"))  # Teto de max_tokens por chamada (limite do modelo)
+MAX_CONCURRENCY = int(os.getenv("MAX_CONCURRENCY", "16"))  # Chamadas LLM simultâneas no processamento de arquivos
 
 # URLs baseadas no ambiente
 def get_urls():
@@ -34,6 +37,19 @@ CERT_URL = "https://lcrspo.serpro.gov.br/ca/ca-pro.pem"
 INPUT_FOLDER = "./justificativas"
 OUTPUT_FOLDER = "./JSON"
 
+# Cache de respostas do LLM (desligado por padrão para manter auditoria chamada a chamada)
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "1000"))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9"))
+SEMANTIC_CACHE_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Servidor da API (cada worker é um processo com estatísticas e logs próprios)
+API_WORKERS = int(os.getenv("API_WORKERS", "1"))
+
+# Agrupamento das atualizações de progresso no WebSocket
+WS_BATCH_SIZE = 10
+WS_BATCH_INTERVAL = 0.2  # segundos
+
 # Thresholds de confiança
 CONFIDENCE_HIGH = 0.7
 CONFIDENCE_MEDIUM = 0.5
@@ -56,4 +72,27 @@ Responda em JSON:
   "confidence": 0.0-1.0
 }}
 
-Justificativa: {justificativa}"""
\ No newline at end of file
+Justificativa: {justificativa}"""
+
+# Prompt para análise em lote (vários itens numerados em uma única chamada)
+BATCH_PROMPT_TEMPLATE = """Você é um especialista em empréstimos consignados.
+Analise cada justificativa numerada abaixo e diga se ela se enquadra em:
+• Consignação sem autorização prévia
+• Consignação sem crédito do valor
+• Desconto de contrato já liquidado
+
+Não aceite:
+• Rediscussão de contrato
+• Requisições de boletos
+
+Responda apenas com um array JSON de {total} objetos, um por item, na mesma ordem:
+[
+  {{
+    "diagnosticoLLM": "SIM" | "NÃO",
+    "justificativaLLM": "explicação breve",
+    "confidence": 0.0-1.0
+  }}
+]
+
+Justificativas:
+{itens}"""
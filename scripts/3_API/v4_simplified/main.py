@@ -1,9 +1,9 @@
 # main.py
-import asyncio
+import logging
 import time
 import uuid
-import json
-from fastapi import FastAPI, WebSocket, HTTPException
+import hashlib
+from fastapi import FastAPI, WebSocket, HTTPException, Request, Response
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
@@ -28,11 +28,20 @@ async def lifespan(app: FastAPI):
     setup_folders()
     serpro_client = SerproClient()
     
+    # Interface web lida uma vez; ETag permite resposta 304 nos recarregamentos
+    try:
+        app.state.index_html = Path("templates/index.html").read_bytes()
+        app.state.index_etag = '"' + hashlib.md5(app.state.index_html).hexdigest() + '"'
+    except Exception as e:
+        app.state.index_html = None
+        semantic_logger.log_error("WEB_INTERFACE", e)
+    
     semantic_logger.log_info("Serpro Client inicializado", "STARTUP")
     
     yield
     
     print("⏹️ Encerrando API")
+    await serpro_client.close()
     semantic_logger.log_info("=== API ENCERRADA ===", "SHUTDOWN")
 
 # Criar app FastAPI
@@ -56,15 +65,20 @@ app.add_middleware(
 app.mount("/static", StaticFiles(directory="templates"), name="static")
 
 @app.get("/", response_class=HTMLResponse)
-async def web_interface():
+async def web_interface(request: Request):
     """Interface web"""
-    try:
-        with open("templates/index.html", "r", encoding="utf-8") as f:
-            semantic_logger.log_info("Interface web acessada", "WEB")
-            return HTMLResponse(f.read())
-    except Exception as e:
-        semantic_logger.log_error("WEB_INTERFACE", e)
+    if app.state.index_html is None:
         raise HTTPException(500, "Erro ao carregar interface")
+    
+    etag = app.state.index_etag
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    semantic_logger.log_info("Interface web acessada", "WEB")
+    return HTMLResponse(
+        app.state.index_html,
+        headers={"ETag": etag, "Cache-Control": "public, max-age=60"}
+    )
 
 @app.post("/analise-semantica", response_model=SemanticaResponse)
 async def analise_semantica(entrada: SemanticaInput):
@@ -77,52 +91,73 @@ async def analise_semantica(entrada: SemanticaInput):
     - pratica_vedada: Código da prática vedada
     - justificativa: Texto com no mínimo 10 caracteres
     """
+    response, _ = await executar_analise(entrada)
+    return response
+
+async def _analyse_core(justificativa: str):
+    """Núcleo da análise: prompt, chamada ao LLM e classificação
+    
+    Usado pela API (com logs e resposta completos) e pelo processamento de
+    arquivos via WebSocket, que só precisa destes campos.
+    """
+    # Criar prompt e chamar LLM
+    prompt = create_prompt(justificativa)
+    llm_start_time = time.time()
+    llm_result = await serpro_client.call_llm(prompt)
+    llm_processing_time = time.time() - llm_start_time
+    
+    # Log da chamada LLM
+    semantic_logger.log_llm_call(prompt, llm_result, processing_time=llm_processing_time)
+    
+    # Classificar resultado
+    diagnostico = llm_result.get("diagnosticoLLM", "NÃO")
+    confidence = llm_result.get("confidence", 0.5)
+    
+    return {
+        "status": classify_result(diagnostico, confidence),
+        "diagnostico_llm": diagnostico,
+        "confidence": float(confidence),
+        "justificativa_llm": llm_result.get("justificativaLLM", "")
+    }
+
+async def executar_analise(entrada: SemanticaInput):
+    """Executa a análise e devolve (resposta, resposta serializada em dicionário)
+    
+    O dicionário é gerado uma única vez e reaproveitado no log e no WebSocket.
+    """
     start_time = time.time()
     analysis_id = str(uuid.uuid4())[:8]
     
     try:
-        # Log da entrada
-        semantic_logger.log_info(f"Nova análise iniciada | ID: {analysis_id} | Termo: {entrada.id_termo}", "API_REQUEST")
-        
-        # Log da justificativa (preview)
-        justificativa_preview = entrada.justificativa[:100] + "..." if len(entrada.justificativa) > 100 else entrada.justificativa
-        semantic_logger.log_info(f"Justificativa: {justificativa_preview}", f"ANALYSIS_{analysis_id}")
-        
-        # Criar prompt e chamar LLM
-        prompt = create_prompt(entrada.justificativa)
-        llm_start_time = time.time()
-        llm_result = await serpro_client.call_llm(prompt)
-        llm_processing_time = time.time() - llm_start_time
-        
-        # Log da chamada LLM
-        semantic_logger.log_llm_call(prompt, llm_result, processing_time=llm_processing_time)
+        # Logs da entrada e da justificativa (preview): mensagens só são montadas com INFO ativo
+        if semantic_logger.logger.isEnabledFor(logging.INFO):
+            semantic_logger.log_info(f"Nova análise iniciada | ID: {analysis_id} | Termo: {entrada.id_termo}", "API_REQUEST")
+            
+            justificativa_preview = entrada.justificativa[:100] + "..." if len(entrada.justificativa) > 100 else entrada.justificativa
+            semantic_logger.log_info(f"Justificativa: {justificativa_preview}", f"ANALYSIS_{analysis_id}")
         
-        # Classificar resultado
-        diagnostico = llm_result.get("diagnosticoLLM", "NÃO")
-        confidence = llm_result.get("confidence", 0.5)
-        status = classify_result(diagnostico, confidence)
+        analysis = await _analyse_core(entrada.justificativa)
         
         processing_time = time.time() - start_time
         
-        # Criar resposta
-        response = SemanticaResponse(
-            status=status,
-            diagnostico_llm=diagnostico,
-            confidence=confidence,
-            justificativa_llm=llm_result.get("justificativaLLM", ""),
+        # Criar resposta (campos gerados internamente, já conferidos por classify_result)
+        response = SemanticaResponse.model_construct(
+            **analysis,
             processing_time=processing_time,
             analysis_id=analysis_id
         )
         
+        payload = response.model_dump()
+        
         # Log do resultado
         semantic_logger.log_api_request(
             endpoint="analise-semantica",
-            result=response.dict(),
+            result=payload,
             processing_time=processing_time
         )
         
         update_stats()
-        return response
+        return response, payload
         
     except HTTPException:
         raise
@@ -147,21 +182,26 @@ async def websocket_endpoint(websocket: WebSocket):
         
         while True:
             data = await websocket.receive_text()
-            message = json.loads(data)
+            
+            # Só decodifica à parte o que pode ser comando de arquivo; análises
+            # individuais vão direto para a validação do pydantic
+            message = loads(data) if '"process_file"' in data else {}
+            action = message.get("action", "unknown")
             
             semantic_logger.log_websocket_event("MESSAGE_RECEIVED", {
                 "client_id": client_id,
-                "action": message.get("action", "unknown")
+                "action": action
             })
             
-            if message.get("action") == "process_file":
+            if action == "process_file":
                 await process_file_ws(websocket, message.get("filename", "100.txt"), client_id)
             else:
                 # Processar entrada individual JSON
                 try:
-                    entrada = SemanticaInput(**message)
-                    result = await analise_semantica(entrada)
-                    await websocket.send_text(result.json())
+                    # Parse + validação numa única passada (pydantic-core)
+                    entrada = SemanticaInput.model_validate_json(data)
+                    result, payload = await executar_analise(entrada)
+                    await send_json(websocket, payload)
                     
                     semantic_logger.log_websocket_event("INDIVIDUAL_ANALYSIS", {
                         "client_id": client_id,
@@ -169,7 +209,7 @@ async def websocket_endpoint(websocket: WebSocket):
                     })
                 except Exception as e:
                     error_msg = str(e)
-                    await websocket.send_text(json.dumps({"error": error_msg}))
+                    await send_json(websocket, {"error": error_msg})
                     semantic_logger.log_websocket_event("PROCESSING_ERROR", {
                         "client_id": client_id,
                         "error": error_msg
@@ -181,6 +221,10 @@ async def websocket_endpoint(websocket: WebSocket):
             "error": str(e)
         })
 
+async def send_json(websocket: WebSocket, data):
+    """Envia mensagem JSON como frame binário (dumps já gera UTF-8)"""
+    await websocket.send_bytes(dumps(data))
+
 async def process_file_ws(websocket: WebSocket, filename: str, client_id: str):
     """Processamento de arquivo via WebSocket"""
     try:
@@ -189,71 +233,95 @@ async def process_file_ws(websocket: WebSocket, filename: str, client_id: str):
         file_path = Path(INPUT_FOLDER) / filename
         if not file_path.exists():
             error_msg = "Arquivo não encontrado"
-            await websocket.send_text(json.dumps({"error": error_msg}))
+            await send_json(websocket, {"error": error_msg})
             semantic_logger.log_error("FILE_PROCESSING", error_msg, {"filename": filename})
             return
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = [line.strip() for line in f.readlines() if line.strip()]
-        
-        # Pular cabeçalho se existir
-        if lines and lines[0].startswith("IDTERMO#CPF"):
-            lines = lines[1:]
-        
-        total = len(lines)
+        # Arquivo lido em streaming (cabeçalho ignorado); total obtido por contagem prévia
+        total = count_lines(file_path)
         results_summary = {"approved": 0, "rejected": 0, "review_required": 0, "errors": 0}
         
-        await websocket.send_text(json.dumps({
+        await send_json(websocket, {
             "status": "started",
             "total": total
-        }))
+        })
         
         semantic_logger.log_info(f"Processando {total} itens do arquivo {filename}", f"FILE_PROC_{client_id}")
         
-        for i, line in enumerate(lines, 1):
-            try:
-                data = parse_line(line)
-                
-                # Criar entrada JSON estruturada
-                entrada = SemanticaInput(
-                    id_termo=data["id_termo"],
-                    cpf=data["cpf"],
-                    pratica_vedada=data["pratica_vedada"],
-                    justificativa=data["justificativa"]
-                )
-                
-                # Processar
-                result = await analise_semantica(entrada)
+        # Atualizações agrupadas: um frame a cada WS_BATCH_SIZE itens ou WS_BATCH_INTERVAL segundos
+        pending = []
+        last_flush = time.monotonic()
+        
+        # Estatísticas globais também atualizadas por lote (itens, erros)
+        batch_counts = [0, 0]
+        
+        async def flush_pending():
+            nonlocal last_flush
+            if pending:
+                await send_json(websocket, {"batch": pending})
+                pending.clear()
+            if batch_counts[0]:
+                update_stats(requests=batch_counts[0], errors=batch_counts[1])
+                batch_counts[0] = batch_counts[1] = 0
+            last_flush = time.monotonic()
+        
+        async def process_line(item):
+            """Analisa uma linha (executada em paralelo, limitada por MAX_CONCURRENCY)"""
+            _, line = item
+            data = parse_line(line)
+            
+            # Criar entrada JSON estruturada
+            entrada = SemanticaInput(
+                id_termo=data.id_termo,
+                cpf=data.cpf,
+                pratica_vedada=data.pratica_vedada,
+                justificativa=data.justificativa
+            )
+            
+            # Processar (apenas o núcleo: sem logs e resposta da API por item)
+            return data, await _analyse_core(entrada.justificativa)
+        
+        # Resultados chegam na ordem de conclusão: o progresso conta itens concluídos (i)
+        # e erros citam a posição do item no arquivo (item_no)
+        i = 0
+        async for (item_no, _), outcome, error in bounded_map(process_line, enumerate(iter_lines(file_path), 1)):
+            i += 1
+            batch_counts[0] += 1
+            if error is None:
+                data, analysis = outcome
                 
                 # Atualizar sumário
-                results_summary[result.status.lower()] += 1
+                results_summary[analysis["status"].lower()] += 1
                 
                 result_data = {
                     "progress": f"{i}/{total}",
                     "percentage": round((i/total) * 100, 1),
-                    "item": data["id_termo"],
-                    "status": result.status,
-                    "diagnostico": result.diagnostico_llm,
-                    "confidence": result.confidence
+                    "item": data.id_termo,
+                    "status": analysis["status"],
+                    "diagnostico": analysis["diagnostico_llm"],
+                    "confidence": analysis["confidence"]
                 }
                 
-                await websocket.send_text(json.dumps(result_data))
-                await asyncio.sleep(1)  # Delay entre itens
-                
-            except Exception as e:
+                pending.append(result_data)
+            else:
+                batch_counts[1] += 1
                 results_summary["errors"] += 1
-                error_msg = f"Erro no item {i}: {str(e)}"
-                await websocket.send_text(json.dumps({"error": error_msg}))
-                semantic_logger.log_error("FILE_ITEM_PROCESSING", e, {"item": i, "filename": filename})
+                error_msg = f"Erro no item {item_no}: {str(error)}"
+                pending.append({"error": error_msg})
+                semantic_logger.log_error("FILE_ITEM_PROCESSING", error, {"item": item_no, "filename": filename})
+            
+            if len(pending) >= WS_BATCH_SIZE or time.monotonic() - last_flush > WS_BATCH_INTERVAL:
+                await flush_pending()
         
-        await websocket.send_text(json.dumps({"status": "completed"}))
+        await flush_pending()
+        await send_json(websocket, {"status": "completed"})
         
         # Log final do processamento
         semantic_logger.log_file_processing(filename, total, results_summary)
         
     except Exception as e:
         error_msg = str(e)
-        await websocket.send_text(json.dumps({"error": error_msg}))
+        await send_json(websocket, {"error": error_msg})
         semantic_logger.log_error("FILE_PROCESSING", e, {"filename": filename, "client_id": client_id})
 
 @app.get("/health")
@@ -272,10 +340,10 @@ async def health_check():
         raise HTTPException(500, "Erro no health check")
 
 @app.get("/stats")
-async def get_statistics():
+async def get_statistics(include_start: bool = False):
     """Estatísticas"""
     try:
-        stats = get_stats()
+        stats = get_stats(include_start)
         semantic_logger.log_info("Estatísticas solicitadas", "STATS")
         return stats
     except Exception as e:
@@ -286,12 +354,7 @@ async def get_statistics():
 async def reset_statistics():
     """Reset estatísticas"""
     try:
-        global stats
-        stats = {
-            "total_requests": 0,
-            "total_errors": 0,
-            "start_time": datetime.now()
-        }
+        reset_stats()
         semantic_logger.log_info("Estatísticas resetadas", "STATS_RESET")
         return {"message": "Estatísticas resetadas"}
     except Exception as e:
@@ -302,17 +365,11 @@ async def reset_statistics():
 async def get_logs():
     """Endpoint para visualizar logs recentes"""
     try:
-        log_file = Path("logs/semantica_api.log")
-        if not log_file.exists():
-            return {"message": "Arquivo de log não encontrado"}
-        
-        # Ler últimas 100 linhas
-        with open(log_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            recent_lines = lines[-100:] if len(lines) > 100 else lines
+        # Últimas 100 linhas mantidas em memória pelo logger
+        total_lines, recent_lines = semantic_logger.recent_logs.recent()
         
         return {
-            "total_lines": len(lines),
+            "total_lines": total_lines,
             "recent_lines": len(recent_lines),
             "logs": recent_lines
         }
@@ -322,4 +379,19 @@ async def get_logs():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    from importlib.util import find_spec
+    
+    # uvloop + httptools quando instalados (uvicorn[standard]); no Windows usa o loop padrão
+    loop = "uvloop" if find_spec("uvloop") is not None else "asyncio"
+    http = "httptools" if find_spec("httptools") is not None else "h11"
+    
+    # Com mais de um worker o uvicorn exige a app como string de import
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop=loop,
+        http=http,
+        ws="websockets",
+        workers=API_WORKERS
+    )
@@ -1,7 +1,7 @@
 # processador.py
 import asyncio
 import time
-import json
+from itertools import islice
 from pathlib import Path
 from datetime import datetime
 from serpro_client import SerproClient
@@ -19,22 +19,15 @@ async def process_file(filename="100.txt"):
         print(f"❌ Arquivo não encontrado: {file_path}")
         return
     
-    # Ler arquivo
-    with open(file_path, 'r', encoding='utf-8') as f:
-        lines = [line.strip() for line in f.readlines() if line.strip()]
+    # Contar itens (o arquivo é lido em streaming, cabeçalho ignorado)
+    total = count_lines(file_path)
     
-    # Pular cabeçalho se existir
-    if lines and lines[0].startswith("IDTERMO#CPF"):
-        lines = lines[1:]
-        print("⏭️ Pulando cabeçalho")
-    
-    print(f"📋 Total de itens: {len(lines)}")
+    print(f"📋 Total de itens: {total}")
     
     # Inicializar
     client = SerproClient()
-    results = []
     stats = {
-        "total": len(lines),
+        "total": total,
         "approved": 0,
         "rejected": 0,
         "review_required": 0,
@@ -43,65 +36,109 @@ async def process_file(filename="100.txt"):
     
     start_time = time.time()
     
-    # Processar cada linha
-    for i, line in enumerate(lines, 1):
-        print(f"\n[{i}/{len(lines)}] Processando...")
+    def build_result(data, llm_result):
+        """Classifica a resposta do LLM e salva o resultado do item"""
+        diagnostico = llm_result.get('diagnosticoLLM', 'NÃO')
+        confidence = llm_result.get('confidence', 0.5)
+        status = classify_result(diagnostico, confidence)
+        
+        # Criar resultado (dados internos já validados: dispensa revalidação do pydantic)
+        result = ProcessingResult.model_construct(
+            id_termo=data.id_termo,
+            cpf=data.cpf,
+            pratica_vedada=data.pratica_vedada,
+            justificativa=data.justificativa,
+            status=status,
+            diagnostico_llm=diagnostico,
+            confidence=float(confidence),
+            justificativa_llm=llm_result.get('justificativaLLM', '')
+        )
+        
+        # Log do resultado
+        print(f"✅ {status} - {diagnostico} ({confidence:.2f})")
+        return result
+    
+    def build_error(i, line, e):
+        """Resultado de erro para o item"""
+        print(f"❌ Erro: {e}")
+        
+        try:
+            data = parse_line(line)
+        except:
+            data = Parsed(f"ERROR_{i}", "", "", line)
+        
+        return ProcessingResult.model_construct(
+            **data._asdict(),
+            status="ERROR",
+            error_message=str(e)
+        )
+    
+    async def process_line(item):
+        """Processa uma linha (executada em paralelo, limitada por MAX_CONCURRENCY)"""
+        i, line = item
+        print(f"\n[{i}/{total}] Processando...")
         
         try:
             # Parse da linha
             data = parse_line(line)
-            print(f"ID: {data['id_termo']} - Justificativa: {data['justificativa'][:50]}...")
+            print(f"ID: {data.id_termo} - Justificativa: {data.justificativa[:50]}...")
             
             # Chamar LLM
-            prompt = create_prompt(data['justificativa'])
+            prompt = create_prompt(data.justificativa)
             llm_result = await client.call_llm(prompt)
             
-            # Classificar resultado
-            diagnostico = llm_result.get('diagnosticoLLM', 'NÃO')
-            confidence = llm_result.get('confidence', 0.5)
-            status = classify_result(diagnostico, confidence)
-            
-            # Criar resultado
-            result = ProcessingResult(
-                id_termo=data['id_termo'],
-                cpf=data['cpf'],
-                pratica_vedada=data['pratica_vedada'],
-                justificativa=data['justificativa'],
-                status=status,
-                diagnostico_llm=diagnostico,
-                confidence=confidence,
-                justificativa_llm=llm_result.get('justificativaLLM', '')
-            )
-            
-            results.append(result)
-            stats[status.lower()] += 1
-            
-            # Log do resultado
-            print(f"✅ {status} - {diagnostico} ({confidence:.2f})")
-            
-            # Salvar resultado individual
-            save_json(result.dict(), f"{data['id_termo']}.json")
+            return [build_result(data, llm_result)]
             
         except Exception as e:
-            print(f"❌ Erro: {e}")
-            
-            # Resultado de erro
+            return [build_error(i, line, e)]
+    
+    async def process_chunk(chunk):
+        """Processa um lote de até LLM_BATCH_SIZE linhas com uma única chamada LLM"""
+        print(f"\n[{chunk[0][0]}-{chunk[-1][0]}/{total}] Processando lote...")
+        
+        chunk_results = []
+        parsed = []
+        for i, line in chunk:
             try:
-                data = parse_line(line)
-            except:
-                data = {"id_termo": f"ERROR_{i}", "cpf": "", "pratica_vedada": "", "justificativa": line}
-            
-            error_result = ProcessingResult(
-                **data,
-                status="ERROR",
-                error_message=str(e)
-            )
-            results.append(error_result)
-            stats["errors"] += 1
+                parsed.append((i, line, parse_line(line)))
+            except Exception as e:
+                chunk_results.append(build_error(i, line, e))
         
-        # Delay entre requisições
-        if i < len(lines):
-            await asyncio.sleep(1)
+        try:
+            llm_results = await client.call_llm_batch([data.justificativa for _, _, data in parsed])
+        except Exception as e:
+            return chunk_results + [build_error(i, line, e) for i, line, _ in parsed]
+        
+        for (i, line, data), llm_result in zip(parsed, llm_results):
+            try:
+                chunk_results.append(build_result(data, llm_result))
+            except Exception as e:
+                chunk_results.append(build_error(i, line, e))
+        return chunk_results
+    
+    # Lotes de LLM_BATCH_SIZE linhas por chamada, ou uma linha por chamada
+    numbered = enumerate(iter_lines(file_path), 1)
+    if LLM_BATCH_SIZE > 1:
+        work = iter(lambda: list(islice(numbered, LLM_BATCH_SIZE)), [])
+        worker = process_chunk
+    else:
+        work = numbered
+        worker = process_line
+    
+    # Resultados em NDJSON: uma linha por item, num único arquivo bufferizado
+    results_name = f"relatorio_{filename.replace('.txt', '')}.ndjson"
+    ensure_dir(Path(OUTPUT_FOLDER))
+    
+    # Processar em paralelo (resultados chegam na ordem de conclusão)
+    try:
+        with open(Path(OUTPUT_FOLDER) / results_name, 'wb', buffering=1 << 20) as out:
+            async for _, item_results, _ in bounded_map(worker, work):
+                for result in item_results:
+                    out.write(dumps(result.model_dump()) + b"\n")
+                    stats["errors" if result.status == "ERROR" else result.status.lower()] += 1
+    finally:
+        # Liberar conexões HTTP do cliente (também em caso de erro)
+        await client.close()
     
     # Estatísticas finais
     total_time = time.time() - start_time
@@ -116,7 +153,7 @@ async def process_file(filename="100.txt"):
     print(f"❌ Rejeitados: {stats['rejected']}")
     print(f"💥 Erros: {stats['errors']}")
     print(f"⏱️ Tempo total: {total_time:.1f}s")
-    print(f"📊 Tempo médio por item: {total_time/len(lines):.1f}s")
+    print(f"📊 Tempo médio por item: {total_time/total:.1f}s")
     
     # Calcular taxas
     if stats['total'] > 0:
@@ -131,7 +168,7 @@ async def process_file(filename="100.txt"):
         "timestamp": datetime.now().isoformat(),
         "estatisticas": stats,
         "tempo_total": total_time,
-        "resultados": [r.dict() for r in results]
+        "arquivo_resultados": results_name
     }
     
     save_json(report, f"relatorio_{filename.replace('.txt', '')}.json")
@@ -0,0 +1,107 @@
+# semantic_cache.py
+import asyncio
+import hashlib
+from collections import OrderedDict
+from config import *
+from logger import semantic_logger
+
+class SemanticCache:
+    """Cache de respostas do LLM em dois níveis
+
+    1. Exato: SHA-256 do prompt em um LRU (OrderedDict)
+    2. Semântico: embedding normalizado da justificativa buscado em um índice
+       FAISS de produto interno (cosseno); acima do limiar reaproveita a resposta
+
+    O nível semântico depende de faiss e sentence-transformers (opcionais).
+    Sem eles o cache funciona apenas no modo exato.
+    """
+
+    def __init__(self, max_size=SEMANTIC_CACHE_SIZE, threshold=SEMANTIC_CACHE_THRESHOLD):
+        self.max_size = max_size
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+
+        self._exact = OrderedDict()   # sha256(prompt) -> resposta
+        self._pending = {}            # sha256(prompt) -> embedding calculado no get
+        self._responses = []          # posição no índice FAISS -> resposta
+        self._index = None
+        self._model = None
+        self.setup_semantic()
+
+    def setup_semantic(self):
+        """Carrega modelo de embeddings e índice FAISS, se disponíveis"""
+        try:
+            import faiss
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            semantic_logger.log_info("faiss/sentence-transformers indisponíveis, usando apenas cache exato", "SEMANTIC_CACHE")
+            return
+
+        self._model = SentenceTransformer(SEMANTIC_CACHE_MODEL)
+        self._index = faiss.IndexFlatIP(self._model.get_sentence_embedding_dimension())
+        semantic_logger.log_info(f"Cache semântico ativo | Modelo: {SEMANTIC_CACHE_MODEL} | Limiar: {self.threshold}", "SEMANTIC_CACHE")
+
+    @staticmethod
+    def _key(prompt):
+        return hashlib.sha256(prompt.encode('utf-8')).digest()
+
+    def _embed(self, text):
+        return self._model.encode([text], normalize_embeddings=True).astype('float32')
+
+    async def get(self, prompt, text):
+        """Busca resposta em cache (exato e depois semântico)
+
+        Args:
+            prompt: Prompt completo enviado ao LLM
+            text: Trecho usado na comparação semântica (justificativa)
+
+        Returns:
+            Cópia da resposta em cache ou None
+        """
+        key = self._key(prompt)
+
+        cached = self._exact.get(key)
+        if cached is not None:
+            self._exact.move_to_end(key)
+            self.hits += 1
+            return dict(cached)
+
+        if self._index is not None:
+            # Embedding é CPU: roda fora do event loop e fica guardado para o put
+            vector = await asyncio.to_thread(self._embed, text)
+            if len(self._pending) >= self.max_size:
+                self._pending.clear()
+            self._pending[key] = vector
+
+            if self._index.ntotal:
+                scores, ids = self._index.search(vector, 1)
+                if scores[0][0] > self.threshold:
+                    self.hits += 1
+                    return dict(self._responses[ids[0][0]])
+
+        self.misses += 1
+        return None
+
+    def put(self, prompt, result):
+        """Armazena resposta nos dois níveis do cache
+
+        Args:
+            prompt: Prompt completo enviado ao LLM
+            result: Resposta já parseada do LLM
+        """
+        key = self._key(prompt)
+
+        self._exact[key] = dict(result)
+        self._exact.move_to_end(key)
+        if len(self._exact) > self.max_size:
+            self._exact.popitem(last=False)
+
+        vector = self._pending.pop(key, None)
+        if self._index is not None and vector is not None:
+            # IndexFlatIP não remove itens individualmente: ao lotar, recomeça
+            if self._index.ntotal >= self.max_size:
+                self._index.reset()
+                self._responses.clear()
+            self._index.add(vector)
+            self._responses.append(dict(result))
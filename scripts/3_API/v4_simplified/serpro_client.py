@@ -1,6 +1,9 @@
 # serpro_client.py
 import os
+import re
 import json
+import ssl
+import orjson
 import time
 import uuid
 import asyncio
@@ -9,23 +12,60 @@ import aiohttp
 from datetime import datetime
 from config import *
 from logger import semantic_logger
+from semantic_cache import SemanticCache
+from utils import create_prompt
+
+# Padrões de extração de JSON da resposta do LLM (compilados uma vez)
+_JSON_RE = re.compile(r'\{[^{}]*\}')
+
+# Decodificador usado para ler o array do lote a partir de um '[' (raw_decode para no fim do valor)
+_JSON_DECODER = json.JSONDecoder()
+
+# Palavras-chave do fallback (aprovação | rejeição), sem distinção de caixa
+_FALLBACK_RE = re.compile(
+    r'\b(?:(sim|aprovado|v[aá]lido|autoriza[cç][aã]o)|(n[aã]o|rejeitado|inv[aá]lido|boleto))\b',
+    re.IGNORECASE
+)
 
 class SerproClient:
     def __init__(self):
         self.access_token = None
         self.token_expires_at = None
+        self._token_lock = asyncio.Lock()  # Uma renovação de token por vez
+        self.cache = SemanticCache() if SEMANTIC_CACHE_ENABLED else None
         self.setup_ssl()
+        
+        # URLs e corpo base da requisição montados uma única vez
+        urls = get_urls()
+        self._token_url = urls["token"]
+        self._chat_url = f"{urls['api']}/chat/completions"
+        self._payload_skeleton = {"model": MODEL_NAME, **LLM_CONFIG}
+        
+        # Sessão HTTP única (pool de conexões com keep-alive), criada no primeiro uso
+        self._ssl_ctx = ssl.create_default_context(cafile=CERT_FILE)
+        self._session = None
         semantic_logger.log_info("Serpro Client inicializado", "SERPRO_CLIENT")
     
     def setup_ssl(self):
         """Configura certificados SSL"""
         try:
-            if not os.path.exists(CERT_FILE):
+            if not os.path.exists(CERT_FILE) or os.path.getsize(CERT_FILE) == 0:
                 semantic_logger.log_info(f"Baixando certificado SSL: {CERT_URL}", "SSL_SETUP")
                 response = requests.get(CERT_URL, verify=False, timeout=10)
                 response.raise_for_status()
-                with open(CERT_FILE, 'wb') as f:
-                    f.write(response.content)
+                
+                # Escrita atômica: arquivo temporário validado e depois renomeado
+                tmp_file = CERT_FILE + ".tmp"
+                try:
+                    with open(tmp_file, 'wb') as f:
+                        f.write(response.content)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    ssl.create_default_context(cafile=tmp_file)  # Falha se o certificado for inválido
+                    os.replace(tmp_file, CERT_FILE)
+                finally:
+                    if os.path.exists(tmp_file):
+                        os.remove(tmp_file)
                 semantic_logger.log_info(f"Certificado SSL baixado: {CERT_FILE}", "SSL_SETUP")
             else:
                 semantic_logger.log_info(f"Certificado SSL já existe: {CERT_FILE}", "SSL_SETUP")
@@ -37,64 +77,96 @@ class SerproClient:
             semantic_logger.log_error("SSL_SETUP", e)
             raise
     
-    def get_access_token(self):
-        """Obtém token de acesso"""
+    async def _get_session(self):
+        """Retorna a sessão HTTP compartilhada, criando-a no event loop atual"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=64, ttl_dns_cache=300, ssl=self._ssl_ctx)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                json_serialize=lambda obj: orjson.dumps(obj).decode(),
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+            )
+        return self._session
+    
+    async def close(self):
+        """Fecha a sessão HTTP compartilhada"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            semantic_logger.log_info("Sessão HTTP encerrada", "SERPRO_CLIENT")
+        self._session = None
+    
+    def _token_valid(self):
+        """Indica se há token em cache dentro do prazo de validade"""
+        return bool(self.access_token and self.token_expires_at
+                    and datetime.now().timestamp() < self.token_expires_at)
+    
+    async def get_access_token(self):
+        """Obtém token de acesso
+        
+        Token válido é devolvido sem lock. A renovação é protegida por lock:
+        chamadas concorrentes aguardam uma única renovação e reaproveitam o token obtido.
+        """
+        # Caminho rápido: token em cache ainda válido
+        if self._token_valid():
+            return self.access_token
+        
         try:
-            # Verificar se token ainda é válido
-            if self.access_token and self.token_expires_at:
-                if datetime.now().timestamp() < self.token_expires_at:
-                    semantic_logger.log_info("Token ainda válido, reutilizando", "TOKEN_REUSE")
+            async with self._token_lock:
+                # Outra chamada pode ter renovado o token enquanto esta aguardava o lock
+                if self._token_valid():
                     return self.access_token
-            
-            semantic_logger.log_info("Solicitando novo token de acesso", "TOKEN_REQUEST")
-            
-            urls = get_urls()
-            data = {"grant_type": "client_credentials"}
-            
-            for attempt in range(MAX_RETRIES):
-                try:
-                    start_time = time.time()
-                    response = requests.post(
-                        urls["token"],
-                        data=data,
-                        auth=(CLIENT_ID, CLIENT_SECRET),
-                        timeout=REQUEST_TIMEOUT
-                    )
-                    request_time = time.time() - start_time
-                    
-                    if response.status_code == 200:
-                        token_data = response.json()
-                        self.access_token = token_data["access_token"]
-                        expires_in = token_data.get("expires_in", 3600)
-                        self.token_expires_at = datetime.now().timestamp() + expires_in - 300
+                
+                semantic_logger.log_info("Solicitando novo token de acesso", "TOKEN_REQUEST")
+                
+                data = {"grant_type": "client_credentials"}
+                auth = aiohttp.BasicAuth(CLIENT_ID, CLIENT_SECRET)
+                session = await self._get_session()
+                
+                for attempt in range(MAX_RETRIES):
+                    try:
+                        start_time = time.time()
+                        async with session.post(
+                            self._token_url,
+                            data=data,
+                            auth=auth,
+                            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+                        ) as response:
+                            request_time = time.time() - start_time
+                            
+                            if response.status == 200:
+                                token_data = orjson.loads(await response.read())
+                                self.access_token = token_data["access_token"]
+                                expires_in = token_data.get("expires_in", 3600)
+                                self.token_expires_at = datetime.now().timestamp() + expires_in - 300
+                                
+                                semantic_logger.log_info(
+                                    f"Token obtido com sucesso | Expira em: {expires_in}s | Tempo: {request_time:.2f}s",
+                                    "TOKEN_SUCCESS"
+                                )
+                                return self.access_token
+                            
+                            error_text = await response.text()
+                            semantic_logger.log_error(
+                                "TOKEN_REQUEST",
+                                f"HTTP {response.status}",
+                                {"attempt": attempt + 1, "response": error_text[:200]}
+                            )
                         
-                        semantic_logger.log_info(
-                            f"Token obtido com sucesso | Expira em: {expires_in}s | Tempo: {request_time:.2f}s",
-                            "TOKEN_SUCCESS"
+                    except Exception as e:
+                        semantic_logger.log_error(
+                            "TOKEN_REQUEST",
+                            e,
+                            {"attempt": attempt + 1, "max_retries": MAX_RETRIES}
                         )
-                        return self.access_token
-                    
-                    semantic_logger.log_error(
-                        "TOKEN_REQUEST",
-                        f"HTTP {response.status_code}",
-                        {"attempt": attempt + 1, "response": response.text[:200]}
-                    )
                     
-                except Exception as e:
-                    semantic_logger.log_error(
-                        "TOKEN_REQUEST",
-                        e,
-                        {"attempt": attempt + 1, "max_retries": MAX_RETRIES}
-                    )
+                    if attempt < MAX_RETRIES - 1:
+                        delay = RETRY_DELAY * (attempt + 1)
+                        semantic_logger.log_info(f"Aguardando {delay}s antes da próxima tentativa", "TOKEN_RETRY")
+                        await asyncio.sleep(delay)
                 
-                if attempt < MAX_RETRIES - 1:
-                    delay = RETRY_DELAY * (attempt + 1)
-                    semantic_logger.log_info(f"Aguardando {delay}s antes da próxima tentativa", "TOKEN_RETRY")
-                    time.sleep(delay)
-            
-            error_msg = f"Falha ao obter token após {MAX_RETRIES} tentativas"
-            semantic_logger.log_error("TOKEN_FAILURE", error_msg)
-            raise Exception(error_msg)
+                error_msg = f"Falha ao obter token após {MAX_RETRIES} tentativas"
+                semantic_logger.log_error("TOKEN_FAILURE", error_msg)
+                raise Exception(error_msg)
             
         except Exception as e:
             semantic_logger.log_error("GET_ACCESS_TOKEN", e)
@@ -107,90 +179,153 @@ class SerproClient:
         try:
             semantic_logger.log_info(f"Iniciando chamada LLM | ID: {call_id}", "LLM_CALL")
             
-            token = self.get_access_token()
-            urls = get_urls()
+            # Cache: prompt idêntico ou justificativa semelhante já respondida
+            if self.cache is not None:
+                cached = await self.cache.get(prompt, prompt.rsplit("Justificativa: ", 1)[-1])
+                if cached is not None:
+                    semantic_logger.log_info(f"Resposta obtida do cache | ID: {call_id}", "LLM_CACHE_HIT")
+                    return cached
             
-            headers = {
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json"
-            }
+            result, request_time = await self._post_completion(prompt, call_id)
+            parsed_result = self.parse_response(result)
             
-            payload = {
-                "model": MODEL_NAME,
-                "messages": [{"role": "user", "content": prompt}],
-                **LLM_CONFIG
-            }
+            if self.cache is not None:
+                self.cache.put(prompt, parsed_result)
             
-            # Log do payload (sem o token)
             semantic_logger.log_info(
-                f"Payload LLM | Model: {MODEL_NAME} | Prompt: {len(prompt)} chars",
-                f"LLM_PAYLOAD_{call_id}"
+                f"LLM sucesso | ID: {call_id} | Status: 200 | "
+                f"Tempo: {request_time:.2f}s | Diagnóstico: {parsed_result.get('diagnosticoLLM', 'N/A')}",
+                "LLM_SUCCESS"
             )
             
-            for attempt in range(MAX_RETRIES):
-                try:
-                    start_time = time.time()
-                    
-                    async with aiohttp.ClientSession() as session:
-                        async with session.post(
-                            f"{urls['api']}/chat/completions",
-                            headers=headers,
-                            json=payload,
-                            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
-                        ) as response:
-                            
-                            request_time = time.time() - start_time
-                            
-                            if response.status == 200:
-                                result = await response.json()
-                                parsed_result = self.parse_response(result)
-                                
-                                semantic_logger.log_info(
-                                    f"LLM sucesso | ID: {call_id} | Status: {response.status} | "
-                                    f"Tempo: {request_time:.2f}s | Diagnóstico: {parsed_result.get('diagnosticoLLM', 'N/A')}",
-                                    "LLM_SUCCESS"
-                                )
-                                
-                                return parsed_result
-                            
-                            if response.status == 401:
-                                semantic_logger.log_info("Token expirado, renovando", f"LLM_TOKEN_REFRESH_{call_id}")
-                                self.access_token = None
-                                continue
-                            
-                            error_text = await response.text()
-                            semantic_logger.log_error(
-                                "LLM_HTTP_ERROR",
-                                f"HTTP {response.status}",
-                                {"attempt": attempt + 1, "response": error_text[:300], "call_id": call_id}
-                            )
-                            
-                except asyncio.TimeoutError:
-                    semantic_logger.log_error(
-                        "LLM_TIMEOUT",
-                        f"Timeout após {REQUEST_TIMEOUT}s",
-                        {"attempt": attempt + 1, "call_id": call_id}
-                    )
-                except Exception as e:
-                    semantic_logger.log_error(
-                        "LLM_REQUEST_ERROR",
-                        e,
-                        {"attempt": attempt + 1, "call_id": call_id}
-                    )
-                
-                if attempt < MAX_RETRIES - 1:
-                    delay = RETRY_DELAY * (attempt + 1)
-                    semantic_logger.log_info(f"Aguardando {delay}s antes da próxima tentativa", f"LLM_RETRY_{call_id}")
-                    await asyncio.sleep(delay)
-            
-            error_msg = f"Falha na chamada LLM após {MAX_RETRIES} tentativas | ID: {call_id}"
-            semantic_logger.log_error("LLM_FAILURE", error_msg)
-            raise Exception(error_msg)
+            return parsed_result
             
         except Exception as e:
             semantic_logger.log_error("CALL_LLM", e, {"call_id": call_id})
             raise
     
+    async def call_llm_batch(self, justificativas):
+        """Analisa várias justificativas em uma única chamada ao Serpro LLM
+        
+        Itens ausentes ou inválidos na resposta em lote são refeitos
+        individualmente via call_llm, um de cada vez.
+        
+        Returns:
+            Lista de resultados na mesma ordem das justificativas
+        """
+        if not justificativas:
+            return []
+        
+        call_id = str(uuid.uuid4())[:8]
+        
+        try:
+            semantic_logger.log_info(f"Iniciando chamada LLM em lote | ID: {call_id} | Itens: {len(justificativas)}", "LLM_BATCH")
+            
+            itens = "\n".join(f"[{i}] {j}" for i, j in enumerate(justificativas, 1))
+            prompt = BATCH_PROMPT_TEMPLATE.format(total=len(justificativas), itens=itens)
+            
+            result, request_time = await self._post_completion(
+                prompt, call_id,
+                max_tokens=min(LLM_CONFIG["max_tokens"] * len(justificativas), LLM_MAX_OUTPUT_TOKENS)
+            )
+            parsed = self.parse_batch_response(result, len(justificativas))
+            
+            missing = [i for i, item in enumerate(parsed) if item is None]
+            semantic_logger.log_info(
+                f"LLM lote sucesso | ID: {call_id} | Tempo: {request_time:.2f}s | "
+                f"Itens: {len(justificativas)} | Refeitos individualmente: {len(missing)}",
+                "LLM_BATCH_SUCCESS"
+            )
+            
+            # Refeitos em sequência: o lote já ocupa uma vaga do bounded_map,
+            # então não abre chamadas extras além de MAX_CONCURRENCY
+            for i in missing:
+                parsed[i] = await self.call_llm(create_prompt(justificativas[i]))
+            
+            return parsed
+            
+        except Exception as e:
+            semantic_logger.log_error("CALL_LLM_BATCH", e, {"call_id": call_id})
+            raise
+    
+    async def _post_completion(self, prompt, call_id, max_tokens=None):
+        """Envia o prompt ao endpoint /chat/completions com novas tentativas
+        
+        Returns:
+            (resposta JSON bruta, tempo da requisição em segundos)
+        """
+        token = await self.get_access_token()
+        
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json"
+        }
+        
+        payload = {**self._payload_skeleton, "messages": [{"role": "user", "content": prompt}]}
+        if max_tokens:
+            payload["max_tokens"] = max_tokens
+        
+        # Log do payload (sem o token)
+        semantic_logger.log_info(
+            f"Payload LLM | Model: {MODEL_NAME} | Prompt: {len(prompt)} chars",
+            f"LLM_PAYLOAD_{call_id}"
+        )
+        
+        for attempt in range(MAX_RETRIES):
+            try:
+                start_time = time.time()
+                
+                session = await self._get_session()
+                async with session.post(
+                    self._chat_url,
+                    headers=headers,
+                    json=payload,
+                    timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+                ) as response:
+                    
+                    request_time = time.time() - start_time
+                    
+                    if response.status == 200:
+                        return orjson.loads(await response.read()), request_time
+                    
+                    if response.status == 401:
+                        semantic_logger.log_info("Token expirado, renovando", f"LLM_TOKEN_REFRESH_{call_id}")
+                        # Só invalida se ninguém renovou ainda; os demais reaproveitam o novo token
+                        if self.access_token == token:
+                            self.access_token = None
+                        token = await self.get_access_token()
+                        headers["Authorization"] = f"Bearer {token}"
+                        continue
+                    
+                    error_text = await response.text()
+                    semantic_logger.log_error(
+                        "LLM_HTTP_ERROR",
+                        f"HTTP {response.status}",
+                        {"attempt": attempt + 1, "response": error_text[:300], "call_id": call_id}
+                    )
+                    
+            except asyncio.TimeoutError:
+                semantic_logger.log_error(
+                    "LLM_TIMEOUT",
+                    f"Timeout após {REQUEST_TIMEOUT}s",
+                    {"attempt": attempt + 1, "call_id": call_id}
+                )
+            except Exception as e:
+                semantic_logger.log_error(
+                    "LLM_REQUEST_ERROR",
+                    e,
+                    {"attempt": attempt + 1, "call_id": call_id}
+                )
+            
+            if attempt < MAX_RETRIES - 1:
+                delay = RETRY_DELAY * (attempt + 1)
+                semantic_logger.log_info(f"Aguardando {delay}s antes da próxima tentativa", f"LLM_RETRY_{call_id}")
+                await asyncio.sleep(delay)
+        
+        error_msg = f"Falha na chamada LLM após {MAX_RETRIES} tentativas | ID: {call_id}"
+        semantic_logger.log_error("LLM_FAILURE", error_msg)
+        raise Exception(error_msg)
+    
     def parse_response(self, response):
         """Parse da resposta LLM"""
         try:
@@ -201,24 +336,24 @@ class SerproClient:
                 "LLM_PARSE"
             )
             
-            # Tenta JSON direto
-            if content.strip().startswith('{'):
-                try:
-                    parsed = json.loads(content)
+            # Tenta JSON direto (orjson aceita espaços nas bordas)
+            try:
+                parsed = orjson.loads(content)
+                if isinstance(parsed, dict):
                     semantic_logger.log_info("Parse JSON direto bem-sucedido", "LLM_PARSE_JSON")
                     return parsed
-                except json.JSONDecodeError as e:
+            except orjson.JSONDecodeError as e:
+                if content.lstrip().startswith('{'):
                     semantic_logger.log_error("LLM_PARSE_JSON", e, {"content_preview": content[:100]})
             
-            # Busca JSON no texto
-            import re
-            match = re.search(r'\{[^{}]*\}', content)
+            # Busca JSON no texto (sem chave, não há o que procurar)
+            match = _JSON_RE.search(content) if '{' in content else None
             if match:
                 try:
-                    parsed = json.loads(match.group())
+                    parsed = orjson.loads(match.group())
                     semantic_logger.log_info("Parse JSON extraído bem-sucedido", "LLM_PARSE_EXTRACT")
                     return parsed
-                except json.JSONDecodeError as e:
+                except orjson.JSONDecodeError as e:
                     semantic_logger.log_error("LLM_PARSE_EXTRACT", e, {"match": match.group()})
             
             # Fallback simples
@@ -229,41 +364,74 @@ class SerproClient:
             semantic_logger.log_error("PARSE_RESPONSE", e, {"response_preview": str(response)[:200]})
             return self.create_fallback(content if 'content' in locals() else "Erro de parsing")
     
-    def create_fallback(self, content):
-        """Fallback quando não há JSON válido"""
+    def parse_batch_response(self, response, total):
+        """Parse da resposta LLM em lote (array JSON com um objeto por item)
+        
+        Returns:
+            Lista com `total` posições; itens ausentes ou inválidos ficam None
+        """
+        parsed = [None] * total
         try:
-            content_lower = content.lower()
-            
-            approve_words = ["sim", "aprovado", "válido", "autorização"]
-            reject_words = ["não", "rejeitado", "inválido", "boleto"]
-            
-            approve_count = sum(1 for word in approve_words if word in content_lower)
-            reject_count = sum(1 for word in reject_words if word in content_lower)
-            
-            if approve_count > reject_count:
-                diagnostico = "SIM"
-                confidence = min(0.8, 0.5 + approve_count * 0.1)
-            else:
-                diagnostico = "NÃO"
-                confidence = min(0.8, 0.5 + reject_count * 0.1)
-            
-            result = {
-                "diagnosticoLLM": diagnostico,
-                "justificativaLLM": content[:100],
-                "confidence": confidence
-            }
+            content = response["choices"][0]["message"]["content"]
             
-            semantic_logger.log_info(
-                f"Fallback criado | Diagnóstico: {diagnostico} | Confiança: {confidence:.2f}",
-                "LLM_FALLBACK"
-            )
+            items = self.extract_batch_array(content)
             
-            return result
+            for i, item in enumerate(items[:total]):
+                if isinstance(item, dict) and "diagnosticoLLM" in item:
+                    parsed[i] = item
             
+            if len(items) != total:
+                semantic_logger.log_info(f"Lote com {len(items)} de {total} itens", "LLM_PARSE_BATCH")
+                
         except Exception as e:
-            semantic_logger.log_error("CREATE_FALLBACK", e)
-            return {
-                "diagnosticoLLM": "NÃO",
-                "justificativaLLM": "Erro no processamento",
-                "confidence": 0.1
-            }
\ No newline at end of file
+            semantic_logger.log_error("PARSE_BATCH_RESPONSE", e, {"response_preview": str(response)[:200]})
+        
+        return parsed
+    
+    @staticmethod
+    def extract_batch_array(content):
+        """Primeiro array JSON de objetos no texto
+        
+        Tenta decodificar um valor completo a partir de cada '['; textos entre
+        colchetes antes do array (ex.: rótulo "[1]" ecoado) são ignorados.
+        """
+        start = content.find('[')
+        while start != -1:
+            try:
+                value, _ = _JSON_DECODER.raw_decode(content, start)
+            except ValueError:
+                value = None
+            if isinstance(value, list) and any(isinstance(item, dict) for item in value):
+                return value
+            start = content.find('[', start + 1)
+        return []
+    
+    def create_fallback(self, content):
+        """Fallback quando não há JSON válido"""
+        # Uma única varredura: grupo 1 = palavras de aprovação, grupo 2 = de rejeição
+        approve_count = reject_count = 0
+        for approve, _ in _FALLBACK_RE.findall(content):
+            if approve:
+                approve_count += 1
+            else:
+                reject_count += 1
+        
+        if approve_count > reject_count:
+            diagnostico = "SIM"
+            confidence = min(0.8, 0.5 + approve_count * 0.1)
+        else:
+            diagnostico = "NÃO"
+            confidence = min(0.8, 0.5 + reject_count * 0.1)
+        
+        result = {
+            "diagnosticoLLM": diagnostico,
+            "justificativaLLM": content[:100],
+            "confidence": confidence
+        }
+        
+        semantic_logger.log_info(
+            f"Fallback criado | Diagnóstico: {diagnostico} | Confiança: {confidence:.2f}",
+            "LLM_FALLBACK"
+        )
+        
+        return result
\ No newline at end of file
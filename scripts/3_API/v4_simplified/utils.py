@@ -1,86 +1,358 @@
 # utils.py
+import os
+import atexit
+import asyncio
 import json
 import uuid
+import functools
+import threading
 import time
 from pathlib import Path
-from datetime import datetime
+from typing import NamedTuple
+from datetime import datetime, timedelta, timezone
 from config import *
 from models import ProcessingResult
 
-# Estatísticas simples
+try:
+    import orjson
+except ImportError:  # Sem o wheel do orjson: loads/dumps usam o json da stdlib
+    orjson = None
+
+# pandas/NumPy/Numba são opcionais: usados apenas nas operações vetorizadas em lote
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+# Pastas de trabalho (Path montado uma vez; mkdir só na primeira utilização)
+_INPUT_DIR = Path(INPUT_FOLDER)
+_OUTPUT_DIR = Path(OUTPUT_FOLDER)
+_LOG_DIR = Path("logs")
+_OUTPUT_FOLDER_STR = str(OUTPUT_FOLDER)  # Caminhos de arquivos de saída montados com os.path.join
+_created_dirs = set()
+_folders_ready = False
+
+# Descritores dos arquivos JSON Lines abertos por save_jsonl (nome -> fd)
+_jsonl_fds = {}
+_JSONL_FLAGS = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0)
+
+# Estatísticas simples (alteradas só sob _stats_lock: event loop e threadpool compartilham)
+_stats_lock = threading.Lock()
 stats = {
     "total_requests": 0,
     "total_errors": 0,
-    "start_time": datetime.now()
+    "start_mono": time.monotonic()  # Relógio monotônico: imune a ajustes no relógio do sistema
 }
 
+# Último resultado de get_stats, reaproveitado enquanto os contadores não mudam
+# (chave, dados) trocados juntos numa única atribuição: leitores nunca veem par misturado
+_stats_cache = {"entry": (None, None)}
+
+class Parsed(NamedTuple):
+    """Campos de uma linha do arquivo de entrada"""
+    id_termo: str
+    cpf: str
+    pratica_vedada: str
+    justificativa: str
+
 def parse_line(line):
     """Parse linha do arquivo (para compatibilidade com processamento em lote)"""
-    parts = line.split("#")
+    # maxsplit=3: '#' dentro da justificativa é preservado sem split + join
+    parts = line.split("#", 3)
     if len(parts) < 4:
         raise ValueError("Formato inválido")
     
-    return {
-        "id_termo": parts[0],
-        "cpf": parts[1],
-        "pratica_vedada": parts[2],
-        "justificativa": "#".join(parts[3:])
-    }
+    return Parsed._make(parts)
+
+def parse_lines_bulk(lines):
+    """Parse vetorizado de muitas linhas de uma vez (pandas)
+    
+    Args:
+        lines: Lista de linhas no formato IDTERMO#CPF#PRATICA VEDADA#JUSTIFICATIVA
+    
+    Returns:
+        (DataFrame com as linhas válidas, posições das linhas com formato ou CPF inválido).
+        As colunas de Parsed trazem os campos brutos, como em parse_line; a coluna
+        extra cpf_digits traz o CPF só com dígitos, usado na validação.
+    """
+    if pd is None:
+        raise ImportError("parse_lines_bulk requer pandas")
+    
+    if not lines:
+        return pd.DataFrame(columns=[*Parsed._fields, "cpf_digits"], dtype=object), []
+    
+    df = pd.Series(lines, dtype=object).str.split("#", n=3, expand=True)
+    # Garante 4 colunas de texto mesmo sem nenhuma linha completa (colunas faltantes viriam float NaN)
+    df = df.reindex(columns=range(4)).astype(object)
+    df.columns = Parsed._fields
+    
+    # CPF validado na mesma passada (regra do SemanticaInput: 11 dígitos após limpeza)
+    df["cpf_digits"] = df["cpf"].fillna("").astype(str).str.replace(r"\D", "", regex=True)
+    invalid = df["justificativa"].isna() | (df["cpf_digits"].str.len() != 11)
+    return df[~invalid], df.index[invalid].tolist()
+
+# Início da linha de cabeçalho do arquivo de entrada
+_HEADER_PREFIX = "IDTERMO#CPF#"
+
+async def bounded_map(func, items, limit=None):
+    """Executa func(item) com no máximo `limit` chamadas simultâneas
+    
+    Os itens são consumidos sob demanda (aceita geradores) e os resultados
+    são devolvidos à medida que ficam prontos, fora da ordem de entrada.
+    
+    Yields:
+        (item, resultado, erro) - erro é a exceção levantada ou None
+    """
+    limit = limit or MAX_CONCURRENCY
+    iterator = iter(items)
+    pending = {}
+    exhausted = False
+    
+    try:
+        while True:
+            while not exhausted and len(pending) < limit:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending[asyncio.ensure_future(func(item))] = item
+            
+            if not pending:
+                return
+            
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                item = pending.pop(task)
+                error = task.exception()
+                yield item, (None if error else task.result()), error
+    finally:
+        # Consumidor interrompido: cancelar chamadas ainda em andamento
+        for task in pending:
+            task.cancel()
+
+def iter_lines(path):
+    """Lê o arquivo de entrada linha a linha (sem carregar tudo em memória)
+    
+    Ignora linhas vazias e o cabeçalho opcional (primeira linha não vazia).
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = (s for line in f if (s := line.strip()))
+        
+        # Cabeçalho verificado uma única vez, fora do laço por linha
+        first = next(lines, None)
+        if first is not None and not first.startswith(_HEADER_PREFIX):
+            yield first
+        yield from lines
+
+def count_lines(path):
+    """Conta os itens do arquivo de entrada percorrendo-o em streaming"""
+    return sum(1 for _ in iter_lines(path))
+
+# Valores fixos devolvidos por normalize_input e pelas classificações
+_FMT_JSON = "json_estruturado"
+_APPROVED = "APPROVED"
+_REVIEW = "REVIEW_REQUIRED"
+_REJECTED = "REJECTED"
 
 def normalize_input(entrada):
     """Normaliza entrada para formato interno"""
     return {
-        "input": entrada.to_internal_format(),
-        "format": "json_estruturado"
+        "input": entrada.internal_format,
+        "format": _FMT_JSON
     }
 
 def classify_result(diagnostico, confidence):
     """Classifica resultado baseado na confiança"""
-    if diagnostico == "SIM" and confidence >= CONFIDENCE_HIGH:
-        return "APPROVED"
-    elif diagnostico == "SIM" and confidence >= CONFIDENCE_MEDIUM:
-        return "REVIEW_REQUIRED"
-    else:
-        return "REJECTED"
+    if diagnostico != "SIM":
+        return _REJECTED
+    if confidence >= CONFIDENCE_HIGH:
+        return _APPROVED
+    if confidence >= CONFIDENCE_MEDIUM:
+        return _REVIEW
+    return _REJECTED
 
+if np is not None and njit is not None:
+    # Códigos do kernel -> status (strings ficam fora do código compilado)
+    _STATUS_BY_CODE = np.array([_REJECTED, _REVIEW, _APPROVED])
+    _NUMBA_MIN_ROWS = 10_000  # Abaixo disso o custo de disparar as threads não compensa
+    
+    @njit(parallel=True, cache=True)
+    def _classify_codes(sim, conf, high, medium):
+        """Classifica em códigos 0/1/2 (REJECTED/REVIEW_REQUIRED/APPROVED)"""
+        out = np.empty(sim.shape[0], dtype=np.int8)
+        for i in prange(sim.shape[0]):
+            if not sim[i]:
+                out[i] = 0
+            elif conf[i] >= high:
+                out[i] = 2
+            elif conf[i] >= medium:
+                out[i] = 1
+            else:
+                out[i] = 0
+        return out
+else:
+    _classify_codes = None
+
+def classify_results_bulk(diagnosticos, confidences):
+    """Classifica muitos resultados de uma vez (mesmas regras de classify_result)
+    
+    Args:
+        diagnosticos: Sequência de diagnósticos do LLM ("SIM"/"NÃO")
+        confidences: Sequência de confianças correspondentes
+    
+    Returns:
+        Array (ou lista, sem NumPy) com APPROVED, REVIEW_REQUIRED ou REJECTED
+    """
+    if np is None:
+        return [classify_result(d, c) for d, c in zip(diagnosticos, confidences)]
+    
+    sim = np.asarray(diagnosticos) == "SIM"
+    conf = np.asarray(confidences, dtype=float)
+    if _classify_codes is not None and sim.shape[0] >= _NUMBA_MIN_ROWS:
+        return _STATUS_BY_CODE[_classify_codes(sim, conf, CONFIDENCE_HIGH, CONFIDENCE_MEDIUM)]
+    
+    return np.select(
+        [sim & (conf >= CONFIDENCE_HIGH), sim & (conf >= CONFIDENCE_MEDIUM)],
+        [_APPROVED, _REVIEW],
+        default=_REJECTED
+    )
+
+# Partes fixas do prompt (antes/depois da justificativa), sem os escapes {{ }} do format
+_PROMPT_PREFIX, _PROMPT_SUFFIX = (
+    part.replace("{{", "{").replace("}}", "}") for part in PROMPT_TEMPLATE.split("{justificativa}", 1)
+)
+
+@functools.lru_cache(maxsize=2048)
 def create_prompt(justificativa):
-    """Cria prompt para LLM"""
-    return PROMPT_TEMPLATE.format(justificativa=justificativa)
+    """Cria prompt para LLM (justificativas repetidas reaproveitam o prompt montado)"""
+    return _PROMPT_PREFIX + justificativa + _PROMPT_SUFFIX
+
+def _json_default(obj):
+    """Serializa modelos pydantic; demais tipos desconhecidos falham como no json da stdlib"""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+# JSON centralizado: orjson quando disponível, json da stdlib como reserva.
+# dumps sempre devolve bytes UTF-8; loads aceita str ou bytes.
+if orjson is not None:
+    def loads(data):
+        return orjson.loads(data)
+    
+    def dumps(obj, *, indent=False):
+        return orjson.dumps(obj, default=_json_default, option=orjson.OPT_INDENT_2 if indent else 0)
+else:
+    def loads(data):
+        return json.loads(data)
+    
+    def dumps(obj, *, indent=False):
+        return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None, default=_json_default).encode("utf-8")
 
 def save_json(data, filename):
     """Salva dados em JSON"""
-    Path(OUTPUT_FOLDER).mkdir(exist_ok=True)
-    filepath = Path(OUTPUT_FOLDER) / filename
+    ensure_dir(_OUTPUT_DIR)
+    filepath = os.path.join(_OUTPUT_FOLDER_STR, filename)
     
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    with open(filepath, 'wb') as f:
+        f.write(dumps(data, indent=True))
 
-def update_stats(error=False):
-    """Atualiza estatísticas"""
-    stats["total_requests"] += 1
-    if error:
-        stats["total_errors"] += 1
+def save_jsonl(data, filename="results.jsonl"):
+    """Acrescenta um registro ao arquivo JSON Lines
+    
+    O arquivo é aberto uma única vez e cada linha sai em um só os.write com
+    O_APPEND: sem open/close por registro e sem linhas intercaladas entre workers.
+    """
+    fd = _jsonl_fds.get(filename)
+    if fd is None:
+        ensure_dir(_OUTPUT_DIR)
+        fd = _jsonl_fds[filename] = os.open(os.path.join(_OUTPUT_FOLDER_STR, filename), _JSONL_FLAGS, 0o644)
+    
+    os.write(fd, dumps(data) + b"\n")
+
+@atexit.register
+def close_jsonl():
+    """Fecha os arquivos abertos por save_jsonl"""
+    while _jsonl_fds:
+        os.close(_jsonl_fds.popitem()[1])
 
-def get_stats():
-    """Retorna estatísticas"""
-    uptime = (datetime.now() - stats["start_time"]).total_seconds()
-    error_rate = (stats["total_errors"] / max(stats["total_requests"], 1)) * 100
+def update_stats(error=False, requests=1, errors=None):
+    """Atualiza estatísticas
     
-    return {
-        "total_requests": stats["total_requests"],
-        "total_errors": stats["total_errors"],
-        "error_rate": round(error_rate, 2),
-        "uptime_seconds": round(uptime, 2)
-    }
+    requests/errors permitem registrar um lote de itens em uma única chamada.
+    """
+    if errors is None:
+        errors = requests if error else 0
+    with _stats_lock:
+        stats["total_requests"] += requests
+        stats["total_errors"] += errors
+
+def get_stats(include_start=False):
+    """Retorna estatísticas
+    
+    include_start acrescenta o início em horário UTC, derivado do uptime só quando pedido.
+    """
+    with _stats_lock:
+        total_requests = stats["total_requests"]
+        total_errors = stats["total_errors"]
+        start_mono = stats["start_mono"]
+    
+    uptime = time.monotonic() - start_mono
+    
+    # Polling sem tráfego novo: só o uptime muda
+    key = (total_requests, total_errors)
+    cached_key, data = _stats_cache["entry"]
+    if cached_key != key:
+        error_rate = (total_errors / total_requests * 100) if total_requests else 0.0
+        data = {
+            "total_requests": total_requests,
+            "total_errors": total_errors,
+            "error_rate": round(error_rate, 2),
+            "uptime_seconds": 0.0
+        }
+        _stats_cache["entry"] = (key, data)
+    
+    # Cópia: quem chama nunca segura (nem altera) o dicionário do cache
+    result = data.copy()
+    result["uptime_seconds"] = round(uptime, 2)
+    if include_start:
+        result["start_time"] = (datetime.now(timezone.utc) - timedelta(seconds=uptime)).isoformat()
+    return result
+
+def ensure_dir(path):
+    """Cria a pasta uma única vez por processo (chamadas seguintes não tocam o disco)"""
+    if path not in _created_dirs:
+        os.makedirs(path, exist_ok=True)
+        _created_dirs.add(path)
+
+def reset_stats():
+    """Zera as estatísticas e reinicia a contagem de uptime"""
+    with _stats_lock:
+        stats["total_requests"] = 0
+        stats["total_errors"] = 0
+        stats["start_mono"] = time.monotonic()
 
 def setup_folders():
     """Cria pastas necessárias"""
-    Path(INPUT_FOLDER).mkdir(exist_ok=True)
-    Path(OUTPUT_FOLDER).mkdir(exist_ok=True)
-    Path("logs").mkdir(exist_ok=True)
+    global _folders_ready
+    if _folders_ready:
+        return
+    for folder in (_INPUT_DIR, _OUTPUT_DIR, _LOG_DIR):
+        ensure_dir(folder)
+    _folders_ready = True
 
 def mask_cpf(cpf):
     """Mascara CPF para logs"""
     if not cpf or len(cpf) < 11:
         return cpf
-    return f"{cpf[:3]}***{cpf[-2:]}"
\ No newline at end of file
+    return cpf[:3] + "***" + cpf[-2:]
\ No newline at end of file